@@ -11,39 +11,28 @@ Features:
 import archives.streamlit as st
 import json
 from pathlib import Path
-import pandas as pd
 from datetime import datetime
 import base64
+import functools
+import hashlib
+import html
+import importlib.util
 import io
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# Optional plotly import
-try:
-    import plotly.express as px
-    import plotly.graph_objects as go
-    HAS_PLOTLY = True
-except ImportError:
-    HAS_PLOTLY = False
-    st.warning("⚠️ Plotly not installed. Install with: pip install plotly")
-
-# BERT score import
-try:
-    from bert_score import score as bert_score_func
-    HAS_BERT_SCORE = True
-except ImportError:
-    HAS_BERT_SCORE = False
-    bert_score_func = None
-
-import torch
-
-# Import from main.py
-from main import (
-    ArxivDatasetFetcher,
-    EnhancedResearchPaperSummarizer,
-    AdvancedSectionExtractor,
-    EnhancedEntityExtractor,
-    FlowchartGenerator,
-    HierarchicalSummarizer
-)
+# Heavy modules (torch, pandas, bert_score and main.py's model stack) are
+# imported on first use so UI-only runs don't pay for CUDA/transformers init.
+HAS_BERT_SCORE = importlib.util.find_spec("bert_score") is not None
+
+
+@functools.lru_cache(maxsize=None)
+def _torch():
+    """Import torch on first use."""
+    import torch
+    return torch
 
 
 # Page configuration
@@ -118,12 +107,52 @@ def init_session_state():
         st.session_state.current_paper_idx = 0
     if 'processing' not in st.session_state:
         st.session_state.processing = False
-    if 'summarizer' not in st.session_state:
-        st.session_state.summarizer = None
     if 'uploaded_papers' not in st.session_state:
         st.session_state.uploaded_papers = []
     if 'uploaded_summaries' not in st.session_state:
         st.session_state.uploaded_summaries = []
+    if 'futures' not in st.session_state:
+        st.session_state.futures = {}
+    if 'summary_errors' not in st.session_state:
+        st.session_state.summary_errors = {}
+
+
+@st.cache_resource(show_spinner="🔧 Loading AI models...")
+def get_summarizer():
+    """Load the summarizer once per process and share it across sessions."""
+    from main import EnhancedResearchPaperSummarizer
+    return EnhancedResearchPaperSummarizer()
+
+
+@st.cache_resource
+def get_executor():
+    """Background pool for paper summarization, shared across sessions.
+    
+    Two workers so a second paper can be fetched/hashed/scored while the
+    first one is on the GPU.
+    """
+    return ThreadPoolExecutor(max_workers=2)
+
+
+@st.cache_resource
+def get_summarizer_lock():
+    """Serializes summarize_paper calls on the shared summarizer.
+    
+    HierarchicalSummarizer loads and unloads its models on shared attributes
+    per section, so two papers must not run through it at the same time.
+    """
+    return threading.Lock()
+
+
+@st.cache_resource
+def get_bert_scorer():
+    """Load the BERTScore model once and keep it resident between calls."""
+    from bert_score import BERTScorer
+    return BERTScorer(
+        lang='en',
+        rescale_with_baseline=False,
+        device='cuda' if _torch().cuda.is_available() else 'cpu'
+    )
 
 
 def render_sidebar():
@@ -189,22 +218,50 @@ def render_sidebar():
     return query, max_results, search_button, None
 
 
+@st.cache_resource
+def get_fetcher():
+    """One arXiv fetcher per process so its HTTP session and connection pool are reused."""
+    from main import ArxivDatasetFetcher
+    return ArxivDatasetFetcher(save_dir="arxiv_papers")
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_papers_cached(query: str, max_results: int) -> list[dict]:
+    """Query arXiv for paper metadata; cached on (query, max_results)."""
+    return get_fetcher().fetch_papers(query=query, max_results=max_results)
+
+
 def fetch_papers(query, max_results):
     """Fetch papers from arXiv."""
     with st.spinner("🔍 Searching arXiv..."):
-        fetcher = ArxivDatasetFetcher(
-            query=query,
-            max_results=max_results,
-            save_dir="arxiv_papers"
-        )
-        papers = fetcher.fetch_papers()
-        pdf_paths = fetcher.download_pdfs(papers)
-        
-        # Attach PDF paths to papers
-        for paper, pdf_path in zip(papers, pdf_paths):
-            paper['pdf_path'] = pdf_path
-        
-        return papers
+        papers = _fetch_papers_cached(query, max_results)
+    
+    # PDF downloads are network-bound, so fetch them concurrently
+    fetcher = get_fetcher()
+    progress_bar = st.progress(0, text="📥 Downloading PDFs...")
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = {executor.submit(fetcher.download_single_pdf, paper): paper for paper in papers}
+        for done, future in enumerate(as_completed(futures), 1):
+            futures[future]['pdf_path'] = future.result()
+            progress_bar.progress(done / len(papers), text=f"📥 Downloaded {done}/{len(papers)} PDFs")
+    progress_bar.empty()
+    
+    # Drop papers whose PDF could not be downloaded
+    return [paper for paper in papers if paper.get('pdf_path')]
+
+
+@st.cache_data(persist="disk", show_spinner=False)
+def _cached_summarize(pdf_sha1: str, _pdf_path: str, _summarizer) -> dict:
+    """Summarize a PDF, cached on the SHA1 of its contents.
+    
+    The underscore-prefixed arguments are not hashed by Streamlit, so the
+    same PDF hits the cache regardless of its filename or temp path.
+    """
+    # No autograd bookkeeping; fp32 submodules (e.g. the SciBERT NER pipeline) run in fp16 on GPU
+    torch = _torch()
+    with get_summarizer_lock(), torch.inference_mode(), \
+            torch.autocast('cuda', dtype=torch.float16, enabled=torch.cuda.is_available()):
+        return _summarizer.summarize_paper(_pdf_path)
 
 
 def process_uploaded_pdf(uploaded_file, summarizer):
@@ -215,55 +272,28 @@ def process_uploaded_pdf(uploaded_file, summarizer):
         import os
         
         with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(uploaded_file.getvalue())
+            uploaded_file.seek(0)
+            shutil.copyfileobj(uploaded_file, tmp_file, length=65536)
             tmp_path = tmp_file.name
         
-        # Create progress container
-        progress_container = st.container()
+        with st.status("📑 Processing paper...", expanded=False) as status:
+            pdf_sha1 = hashlib.sha1(uploaded_file.getbuffer()).hexdigest()
+            summary_data = _cached_summarize(pdf_sha1, tmp_path, summarizer)
+            status.update(label="✅ Summary ready", state="complete")
         
-        with progress_container:
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            # Step 1: Extract sections
-            status_text.text("📑 Step 1/5: Extracting sections with layout analysis...")
-            progress_bar.progress(20)
-            
-            # Step 2-4 happen inside summarizer
-            status_text.text("🤖 Step 2/5: Processing with hierarchical summarization...")
-            progress_bar.progress(40)
-            
-            # Run the summarizer
-            summary_data = summarizer.summarize_paper(tmp_path)
-            
-            status_text.text("🎯 Step 3/5: Extracting entities...")
-            progress_bar.progress(60)
-            
-            status_text.text("🔑 Step 4/5: Generating keywords...")
-            progress_bar.progress(80)
-            
-            status_text.text("✅ Step 5/5: Finalizing summary...")
-            progress_bar.progress(100)
-            
-            # Clear progress indicators
-            import time
-            time.sleep(0.5)
-            progress_bar.empty()
-            status_text.empty()
-            
-            # Add metadata
-            summary_data.update({
-                "title": uploaded_file.name.replace('.pdf', ''),
-                "authors": ["Unknown"],
-                "arxiv_id": "uploaded",
-                "published": datetime.now().strftime("%Y-%m-%d"),
-                "primary_category": "Uploaded",
-                "abstract_original": "",
-                "pdf_url": "",
-                "pdf_path": tmp_path
-            })
-            
-            return summary_data, tmp_path
+        # Add metadata
+        summary_data.update({
+            "title": uploaded_file.name.replace('.pdf', ''),
+            "authors": ["Unknown"],
+            "arxiv_id": "uploaded",
+            "published": datetime.now().strftime("%Y-%m-%d"),
+            "primary_category": "Uploaded",
+            "abstract_original": "",
+            "pdf_url": "",
+            "pdf_path": tmp_path
+        })
+        
+        return summary_data, tmp_path
             
     except Exception as e:
         st.error(f"Error processing uploaded PDF: {e}")
@@ -272,9 +302,20 @@ def process_uploaded_pdf(uploaded_file, summarizer):
         return None, None
 
 
+@st.cache_data(show_spinner=False)
+def _cached_bert(cand: str, ref: str) -> dict:
+    """Score one (summary, reference) pair; cached across reruns and sessions."""
+    P, R, F1 = get_bert_scorer().score([cand], [ref])
+    return {
+        'precision': float(P[0]),
+        'recall': float(R[0]),
+        'f1': float(F1[0])
+    }
+
+
 def calculate_bert_score(summary, reference):
     """Calculate BERT F1 score between summary and reference."""
-    if not HAS_BERT_SCORE or not bert_score_func:
+    if not HAS_BERT_SCORE:
         return None
     
     if not reference or not summary:
@@ -282,53 +323,50 @@ def calculate_bert_score(summary, reference):
     
     try:
         with st.spinner("📊 Calculating BERT F1 score..."):
-            P, R, F1 = bert_score_func(
-                [summary],
-                [reference],
-                lang='en',
-                verbose=False,
-                device='cuda' if torch.cuda.is_available() else 'cpu'
-            )
-            return {
-                'precision': float(P[0]),
-                'recall': float(R[0]),
-                'f1': float(F1[0])
-            }
+            return _cached_bert(summary, reference)
     except Exception as e:
         st.warning(f"BERT score calculation failed: {e}")
         return None
 
 
+def calculate_bert_scores_batch(cands, refs, batch_size=32):
+    """Calculate BERT scores for many (summary, reference) pairs in one pass.
+    
+    Halves the batch size and retries if the GPU runs out of memory.
+    """
+    if not HAS_BERT_SCORE or not cands:
+        return [None] * len(cands)
+    
+    torch = _torch()
+    with st.spinner(f"📊 Calculating BERT F1 scores for {len(cands)} papers..."):
+        while True:
+            try:
+                P, R, F1 = get_bert_scorer().score(cands, refs, batch_size=batch_size)
+                return [
+                    {'precision': float(p), 'recall': float(r), 'f1': float(f)}
+                    for p, r, f in zip(P, R, F1)
+                ]
+            except torch.cuda.OutOfMemoryError:
+                if batch_size == 1:
+                    st.warning("BERT score calculation ran out of GPU memory")
+                    return [None] * len(cands)
+                torch.cuda.empty_cache()
+                batch_size //= 2
+            except Exception as e:
+                st.warning(f"BERT score calculation failed: {e}")
+                return [None] * len(cands)
+
+
 def process_paper(paper, summarizer, calculate_bert=True):
     """Process a single paper and generate summary with progress tracking."""
     try:
-        # Create progress container
-        progress_container = st.container()
-        
-        with progress_container:
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            # Step 1: Extract sections
-            status_text.text("📑 Step 1/5: Extracting sections with layout analysis...")
-            progress_bar.progress(20)
+        with st.status("📑 Processing paper...", expanded=False) as status:
+            pdf_sha1 = hashlib.sha1(Path(paper['pdf_path']).read_bytes()).hexdigest()
+            summary_data = _cached_summarize(pdf_sha1, paper['pdf_path'], summarizer)
             
-            # Step 2-4 happen inside summarizer (can't track easily)
-            status_text.text("🤖 Step 2/5: Processing with hierarchical summarization...")
-            progress_bar.progress(40)
-            
-            # Actually run the summarizer
-            summary_data = summarizer.summarize_paper(paper['pdf_path'])
-            
-            status_text.text("🎯 Step 3/5: Extracting entities...")
-            progress_bar.progress(60)
-            
-            status_text.text("🔑 Step 4/5: Generating keywords...")
-            progress_bar.progress(80)
-            
-            # Calculate BERT score if reference available
-            if calculate_bert and paper.get("summary") and HAS_BERT_SCORE:
-                status_text.text("📊 Step 5/5: Calculating BERT F1 score...")
+            # Calculate BERT score if reference available and not already scored
+            if calculate_bert and 'f1' not in summary_data and paper.get("summary") and HAS_BERT_SCORE:
+                status.update(label="📊 Calculating BERT F1 score...")
                 bert_scores = calculate_bert_score(
                     summary_data['overall_summary'],
                     paper['summary']
@@ -336,54 +374,76 @@ def process_paper(paper, summarizer, calculate_bert=True):
                 if bert_scores:
                     summary_data.update(bert_scores)
             
-            status_text.text("✅ Finalizing summary...")
-            progress_bar.progress(100)
-            
-            # Clear progress indicators after short delay
-            import time
-            time.sleep(0.5)
-            progress_bar.empty()
-            status_text.empty()
-            
-            summary_data.update({
-            "title": paper["title"],
-            "authors": paper["authors"],
-            "arxiv_id": paper["arxiv_id"],
-            "published": paper["published"],
-            "primary_category": paper.get("primary_category", ""),
-            "abstract_original": paper.get("summary", ""),
-            "pdf_url": paper.get("pdf_url", ""),
-        })
+            status.update(label="✅ Summary ready", state="complete")
+        
+        summary_data.update(paper_metadata(paper))
         return summary_data
     except Exception as e:
         st.error(f"Error processing paper: {e}")
         return None
 
 
-def render_paper_card(paper, idx):
-    """Render a paper card with basic info."""
-    with st.container():
-        col1, col2 = st.columns([3, 1])
-        
-        with col1:
-            st.markdown(f"### {idx + 1}. {paper['title']}")
-            st.markdown(f"**Authors:** {', '.join(paper['authors'][:3])}{'...' if len(paper['authors']) > 3 else ''}")
-            st.markdown(f"**Published:** {paper['published'][:10]} | **Category:** {paper.get('primary_category', 'N/A')}")
-        
-        with col2:
-            if st.button("📄 Summarize", key=f"summarize_{idx}", use_container_width=True):
-                return True
+def paper_metadata(paper):
+    """arXiv metadata attached to every paper summary."""
+    return {
+        "title": paper["title"],
+        "authors": paper["authors"],
+        "arxiv_id": paper["arxiv_id"],
+        "published": paper["published"],
+        "primary_category": paper.get("primary_category", ""),
+        "abstract_original": paper.get("summary", ""),
+        "pdf_url": paper.get("pdf_url", ""),
+    }
+
+
+def summarize_paper_background(paper, summarizer):
+    """process_paper for the background executor.
     
-    st.markdown("---")
-    return False
+    Runs off the script thread, so it must not call any st.* elements;
+    errors propagate through the future instead. A BERTScore failure
+    doesn't fail the summary: it is returned unscored, with the error under
+    'bert_error' for the overview to show.
+    """
+    pdf_sha1 = hashlib.sha1(Path(paper['pdf_path']).read_bytes()).hexdigest()
+    summary_data = _cached_summarize(pdf_sha1, paper['pdf_path'], summarizer)
+    
+    if 'f1' not in summary_data and paper.get("summary") and HAS_BERT_SCORE:
+        try:
+            summary_data.update(_cached_bert(summary_data['overall_summary'], paper['summary']))
+        except Exception as e:
+            summary_data['bert_error'] = str(e)
+    
+    summary_data.update(paper_metadata(paper))
+    return summary_data
 
 
+@st.fragment(run_every=1)
+def poll_pending_summaries():
+    """Collect finished background summaries once a second, then rerun the app to show them."""
+    futures = st.session_state.futures
+    done = [idx for idx, future in futures.items() if future.done()]
+    
+    for idx in done:
+        future = futures.pop(idx)
+        try:
+            st.session_state.summaries[idx] = future.result()
+        except Exception as e:
+            st.session_state.summary_errors[idx] = str(e)
+    
+    if done:
+        st.rerun()
+    st.caption(f"⏳ Summarizing {len(futures)} paper(s) in the background...")
+
+
+@st.fragment
 def render_summary_overview(summary):
     """Render summary overview with metrics."""
     st.markdown('<div class="section-header">📊 Summary Overview</div>', unsafe_allow_html=True)
     
     # Check if BERT scores are available
     has_bert_scores = 'f1' in summary
+    if summary.get('bert_error'):
+        st.warning(f"BERT score calculation failed: {summary['bert_error']}")
     
     if has_bert_scores:
         col1, col2, col3, col4, col5 = st.columns(5)
@@ -464,6 +524,17 @@ def render_summary_overview(summary):
         st.warning("⚠️ Install bert-score for quality metrics: `pip install bert-score`")
 
 
+def render_badges(items, css_class, style=""):
+    """Render a list of badges as a single HTML element."""
+    style_attr = f' style="{style}"' if style else ""
+    badges = "".join(
+        f'<span class="{css_class}"{style_attr}>{html.escape(str(item))}</span>'
+        for item in items
+    )
+    st.markdown(badges, unsafe_allow_html=True)
+
+
+@st.fragment
 def render_entities_section(entities):
     """Render extracted entities with visual badges."""
     st.markdown('<div class="section-header">🎯 Extracted Entities</div>', unsafe_allow_html=True)
@@ -473,28 +544,26 @@ def render_entities_section(entities):
     with col1:
         st.markdown("**📊 Datasets**")
         if entities['datasets']:
-            for dataset in entities['datasets'][:8]:
-                st.markdown(f'<span class="entity-badge">{dataset}</span>', unsafe_allow_html=True)
+            render_badges(entities['datasets'][:8], "entity-badge")
         else:
             st.info("No datasets detected")
     
     with col2:
         st.markdown("**🤖 Models**")
         if entities['models']:
-            for model in entities['models'][:8]:
-                st.markdown(f'<span class="entity-badge">{model}</span>', unsafe_allow_html=True)
+            render_badges(entities['models'][:8], "entity-badge")
         else:
             st.info("No models detected")
     
     with col3:
         st.markdown("**📈 Metrics**")
         if entities['metrics']:
-            for metric in entities['metrics'][:8]:
-                st.markdown(f'<span class="entity-badge">{metric}</span>', unsafe_allow_html=True)
+            render_badges(entities['metrics'][:8], "entity-badge")
         else:
             st.info("No metrics detected")
 
 
+@st.fragment
 def render_keywords_section(keywords, section_keywords):
     """Render keywords with visual representation."""
     st.markdown('<div class="section-header">🔑 Keywords Analysis</div>', unsafe_allow_html=True)
@@ -502,8 +571,7 @@ def render_keywords_section(keywords, section_keywords):
     # Overall keywords
     st.markdown("**Overall Keywords**")
     if keywords:
-        for kw in keywords:
-            st.markdown(f'<span class="keyword-badge">{kw}</span>', unsafe_allow_html=True)
+        render_badges(keywords, "keyword-badge")
     
     st.markdown("")
     
@@ -513,10 +581,10 @@ def render_keywords_section(keywords, section_keywords):
         for idx, (section, kws) in enumerate(section_keywords.items()):
             with cols[idx]:
                 st.markdown(f"**{section.title()}**")
-                for kw in kws[:5]:
-                    st.markdown(f'<span class="keyword-badge" style="font-size: 0.8rem;">{kw}</span>', unsafe_allow_html=True)
+                render_badges(kws[:5], "keyword-badge", style="font-size: 0.8rem;")
 
 
+@st.fragment
 def render_section_summaries(section_summaries):
     """Render per-section summaries in expandable sections."""
     st.markdown('<div class="section-header">📑 Section Summaries</div>', unsafe_allow_html=True)
@@ -547,6 +615,7 @@ def render_section_summaries(section_summaries):
             st.caption(f"📊 {word_count} words")
 
 
+@st.fragment
 def render_flowchart(flowchart):
     """Render methodology flowchart."""
     st.markdown('<div class="section-header">🔄 Methodology Flowchart</div>', unsafe_allow_html=True)
@@ -576,28 +645,14 @@ def render_flowchart(flowchart):
 
 
 def create_keyword_chart(section_keywords):
-    """Create a bar chart of keywords per section."""
-    if not section_keywords or not HAS_PLOTLY:
-        return None
+    """Create keyword counts per section for st.bar_chart."""
+    import pandas as pd
     
-    data = []
-    for section, keywords in section_keywords.items():
-        for kw in keywords:
-            data.append({'Section': section.title(), 'Keyword': kw, 'Count': 1})
-    
-    if not data:
+    counts = {section.title(): len(kws) for section, kws in (section_keywords or {}).items() if kws}
+    if not counts:
         return None
     
-    df = pd.DataFrame(data)
-    fig = px.bar(
-        df.groupby('Section').size().reset_index(name='Keywords'),
-        x='Section',
-        y='Keywords',
-        title='Keywords Distribution Across Sections',
-        color='Section'
-    )
-    fig.update_layout(showlegend=False)
-    return fig
+    return pd.Series(counts, name="Keywords")
 
 
 def export_summary(summary, format='json'):
@@ -605,24 +660,106 @@ def export_summary(summary, format='json'):
     if format == 'json':
         return json.dumps(summary, indent=2)
     elif format == 'markdown':
-        md = f"# {summary['title']}\n\n"
-        md += f"**Authors:** {', '.join(summary['authors'])}\n\n"
-        md += f"**Published:** {summary['published']}\n\n"
-        md += f"## Summary\n\n{summary['overall_summary']}\n\n"
-        md += f"## Keywords\n\n{', '.join(summary['overall_keywords'])}\n\n"
+        # Collect blocks and join once; each block is followed by a blank line
+        parts = [
+            f"# {summary['title']}\n",
+            f"**Authors:** {', '.join(summary['authors'])}\n",
+            f"**Published:** {summary['published']}\n",
+            f"## Summary\n\n{summary['overall_summary']}\n",
+            f"## Keywords\n\n{', '.join(summary['overall_keywords'])}\n",
+        ]
         
         if summary.get('entities'):
-            md += f"## Entities\n\n"
-            md += f"- **Datasets:** {', '.join(summary['entities']['datasets'])}\n"
-            md += f"- **Models:** {', '.join(summary['entities']['models'])}\n"
-            md += f"- **Metrics:** {', '.join(summary['entities']['metrics'])}\n\n"
+            parts.append("## Entities\n")
+            parts.append(
+                f"- **Datasets:** {', '.join(summary['entities']['datasets'])}\n"
+                f"- **Models:** {', '.join(summary['entities']['models'])}\n"
+                f"- **Metrics:** {', '.join(summary['entities']['metrics'])}\n"
+            )
         
         if summary.get('section_summaries'):
-            md += f"## Section Summaries\n\n"
+            parts.append("## Section Summaries\n")
             for section, text in summary['section_summaries'].items():
-                md += f"### {section.title()}\n\n{text}\n\n"
+                parts.append(f"### {section.title()}\n\n{text}\n")
+        
+        return "\n".join(parts) + "\n"
+
+
+@st.fragment
+def render_export_tab(summary, file_label: str):
+    """Export controls; a fragment so changing the format only reruns this tab."""
+    st.markdown("### Export Summary")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        export_format = st.selectbox("Format", ["JSON", "Markdown"])
+    with col2:
+        st.metric("Sections Detected", len(summary.get('sections_found', [])))
+    
+    format_key = export_format.lower()
+    export_content = export_summary(summary, format_key)
+    
+    st.download_button(
+        label=f"📥 Download as {export_format}",
+        data=export_content,
+        file_name=f"summary_{file_label}.{format_key if format_key != 'markdown' else 'md'}",
+        mime=f"application/{format_key}" if format_key == 'json' else "text/markdown"
+    )
+    
+    # Rendering the full highlighted payload is slow for long papers; preview on demand
+    with st.expander("Preview export", expanded=False):
+        st.code(export_content[:10_000], language=format_key)
+        if len(export_content) > 10_000:
+            st.caption("Preview truncated to 10,000 characters; the download contains the full export.")
+
+
+def render_summary_tabs(summary, file_label: str):
+    """Render the tabbed view (overview, summaries, entities, keywords, flowchart, export) for one summary."""
+    # Tabs for different views
+    summary_tabs = st.tabs([
+        "📊 Overview",
+        "📝 Summaries",
+        "🎯 Entities",
+        "🔑 Keywords",
+        "🔄 Flowchart",
+        "📤 Export"
+    ])
+    
+    with summary_tabs[0]:
+        render_summary_overview(summary)
+        
+        # Show detected sections
+        if summary.get('sections_found'):
+            st.markdown("**📑 Detected Sections**")
+            sections_str = " → ".join([s.replace('_', ' ').title() for s in summary['sections_found']])
+            st.success(sections_str)
         
-        return md
+        st.markdown("")
+        st.markdown("**📝 Overall Summary**")
+        st.info(summary['overall_summary'])
+        
+        # Visualization
+        chart = create_keyword_chart(summary.get('section_keywords', {}))
+        if chart is not None:
+            st.bar_chart(chart, use_container_width=True)
+    
+    with summary_tabs[1]:
+        render_section_summaries(summary.get('section_summaries', {}))
+    
+    with summary_tabs[2]:
+        render_entities_section(summary.get('entities', {}))
+    
+    with summary_tabs[3]:
+        render_keywords_section(
+            summary.get('overall_keywords', []),
+            summary.get('section_keywords', {})
+        )
+    
+    with summary_tabs[4]:
+        render_flowchart(summary.get('methodology_flowchart'))
+    
+    with summary_tabs[5]:
+        render_export_tab(summary, file_label)
 
 
 def main():
@@ -642,14 +779,11 @@ def main():
     if uploaded_file is not None:
         st.info(f"📄 Uploaded file: **{uploaded_file.name}**")
         
-        # Initialize summarizer if not done
-        if st.session_state.summarizer is None:
-            with st.spinner("🔧 Loading AI models..."):
-                st.session_state.summarizer = EnhancedResearchPaperSummarizer()
+        summarizer = get_summarizer()
         
         # Process uploaded PDF
         with st.spinner(f"🤖 Processing uploaded PDF: {uploaded_file.name}..."):
-            summary, tmp_path = process_uploaded_pdf(uploaded_file, st.session_state.summarizer)
+            summary, tmp_path = process_uploaded_pdf(uploaded_file, summarizer)
             
             if summary:
                 # Store in uploaded papers
@@ -661,70 +795,7 @@ def main():
                 st.markdown("---")
                 st.markdown(f"## 📄 {summary['title']}")
                 
-                # Tabs for different views
-                summary_tabs = st.tabs([
-                    "📊 Overview",
-                    "📝 Summaries",
-                    "🎯 Entities",
-                    "🔑 Keywords",
-                    "🔄 Flowchart",
-                    "📤 Export"
-                ])
-                
-                with summary_tabs[0]:
-                    render_summary_overview(summary)
-                    
-                    # Show detected sections
-                    if summary.get('sections_found'):
-                        st.markdown("**📑 Detected Sections**")
-                        sections_str = " → ".join([s.replace('_', ' ').title() for s in summary['sections_found']])
-                        st.success(sections_str)
-                    
-                    st.markdown("")
-                    st.markdown("**📝 Overall Summary**")
-                    st.info(summary['overall_summary'])
-                    
-                    # Visualization
-                    if HAS_PLOTLY:
-                        chart = create_keyword_chart(summary.get('section_keywords', {}))
-                        if chart:
-                            st.plotly_chart(chart, use_container_width=True)
-                
-                with summary_tabs[1]:
-                    render_section_summaries(summary.get('section_summaries', {}))
-                
-                with summary_tabs[2]:
-                    render_entities_section(summary.get('entities', {}))
-                
-                with summary_tabs[3]:
-                    render_keywords_section(
-                        summary.get('overall_keywords', []),
-                        summary.get('section_keywords', {})
-                    )
-                
-                with summary_tabs[4]:
-                    render_flowchart(summary.get('methodology_flowchart'))
-                
-                with summary_tabs[5]:
-                    st.markdown("### Export Summary")
-                    
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        export_format = st.selectbox("Format", ["JSON", "Markdown"])
-                    with col2:
-                        st.metric("Sections Detected", len(summary.get('sections_found', [])))
-                    
-                    format_key = export_format.lower()
-                    export_content = export_summary(summary, format_key)
-                    
-                    st.download_button(
-                        label=f"📥 Download as {export_format}",
-                        data=export_content,
-                        file_name=f"summary_{uploaded_file.name.replace('.pdf', '')}.{format_key if format_key != 'markdown' else 'md'}",
-                        mime=f"application/{format_key}" if format_key == 'json' else "text/markdown"
-                    )
-                    
-                    st.code(export_content, language=format_key)
+                render_summary_tabs(summary, uploaded_file.name.replace('.pdf', ''))
                 
                 # Clean up temp file
                 import os
@@ -742,6 +813,9 @@ def main():
         if papers:
             st.session_state.papers = papers
             st.session_state.summaries = [None] * len(papers)
+            # Results of in-flight jobs would land on the wrong rows
+            st.session_state.futures = {}
+            st.session_state.summary_errors = {}
             st.success(f"✅ Found {len(papers)} papers!")
     
     # Display papers
@@ -749,117 +823,95 @@ def main():
         tab1, tab2 = st.tabs(["📋 Paper List", "📊 Batch Analysis"])
         
         with tab1:
-            # Paper list
-            for idx, paper in enumerate(st.session_state.papers):
-                if render_paper_card(paper, idx):
-                    st.session_state.current_paper_idx = idx
-                    
-                    # Initialize summarizer if not done
-                    if st.session_state.summarizer is None:
-                        with st.spinner("🔧 Loading AI models..."):
-                            st.session_state.summarizer = EnhancedResearchPaperSummarizer()
+            import pandas as pd
+            
+            # Paper list as a single table; selecting a row summarizes that paper
+            papers_df = pd.DataFrame([
+                {
+                    '#': i + 1,
+                    'Title': p['title'],
+                    'Authors': ', '.join(p['authors'][:3]) + ('...' if len(p['authors']) > 3 else ''),
+                    'Published': p['published'][:10],
+                    'Category': p.get('primary_category', 'N/A'),
+                }
+                for i, p in enumerate(st.session_state.papers)
+            ])
+            selection = st.dataframe(
+                papers_df,
+                hide_index=True,
+                use_container_width=True,
+                on_select="rerun",
+                selection_mode="single-row",
+                key="paper_table"
+            )
+            
+            selected_rows = selection.selection.rows
+            if selected_rows and selected_rows[0] < len(st.session_state.papers):
+                idx = selected_rows[0]
+                st.session_state.current_paper_idx = idx
+                
+                if (st.session_state.summaries[idx] is None
+                        and idx not in st.session_state.futures
+                        and idx not in st.session_state.summary_errors):
+                    summarizer = get_summarizer()
                     
-                    # Process paper
-                    with st.spinner(f"🤖 Processing paper {idx + 1}..."):
-                        summary = process_paper(paper, st.session_state.summarizer)
-                        if summary:
-                            st.session_state.summaries[idx] = summary
-                            st.rerun()
+                    # Summarize in the background so the table stays usable
+                    st.session_state.futures[idx] = get_executor().submit(
+                        summarize_paper_background, st.session_state.papers[idx], summarizer
+                    )
+            
+            if st.session_state.futures:
+                poll_pending_summaries()
             
             # Display summary if available
             current_idx = st.session_state.current_paper_idx
-            if st.session_state.summaries[current_idx]:
+            if current_idx in st.session_state.summary_errors:
+                st.error(f"Error processing paper: {st.session_state.summary_errors[current_idx]}")
+            elif st.session_state.summaries[current_idx]:
                 summary = st.session_state.summaries[current_idx]
                 
                 st.markdown("---")
                 st.markdown(f"## 📄 {summary['title']}")
                 
-                # Tabs for different views
-                summary_tabs = st.tabs([
-                    "📊 Overview",
-                    "📝 Summaries",
-                    "🎯 Entities",
-                    "🔑 Keywords",
-                    "🔄 Flowchart",
-                    "📤 Export"
-                ])
-                
-                with summary_tabs[0]:
-                    render_summary_overview(summary)
-                    
-                    # Show detected sections
-                    if summary.get('sections_found'):
-                        st.markdown("**📑 Detected Sections**")
-                        sections_str = " → ".join([s.replace('_', ' ').title() for s in summary['sections_found']])
-                        st.success(sections_str)
-                    
-                    st.markdown("")
-                    st.markdown("**📝 Overall Summary**")
-                    st.info(summary['overall_summary'])
-                    
-                    # Visualization (only if plotly available)
-                    if HAS_PLOTLY:
-                        chart = create_keyword_chart(summary.get('section_keywords', {}))
-                        if chart:
-                            st.plotly_chart(chart, use_container_width=True)
-                    else:
-                        st.info("💡 Install plotly for keyword visualizations: pip install plotly")
-                
-                with summary_tabs[1]:
-                    render_section_summaries(summary.get('section_summaries', {}))
-                
-                with summary_tabs[2]:
-                    render_entities_section(summary.get('entities', {}))
-                
-                with summary_tabs[3]:
-                    render_keywords_section(
-                        summary.get('overall_keywords', []),
-                        summary.get('section_keywords', {})
-                    )
-                
-                with summary_tabs[4]:
-                    render_flowchart(summary.get('methodology_flowchart'))
-                
-                with summary_tabs[5]:
-                    st.markdown("### Export Summary")
-                    
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        export_format = st.selectbox("Format", ["JSON", "Markdown"])
-                    with col2:
-                        st.metric("Sections Detected", len(summary.get('sections_found', [])))
-                    
-                    format_key = export_format.lower()
-                    export_content = export_summary(summary, format_key)
-                    
-                    st.download_button(
-                        label=f"📥 Download as {export_format}",
-                        data=export_content,
-                        file_name=f"summary_{summary['arxiv_id']}.{format_key if format_key != 'markdown' else 'md'}",
-                        mime=f"application/{format_key}" if format_key == 'json' else "text/markdown"
-                    )
-                    
-                    st.code(export_content, language=format_key)
+                render_summary_tabs(summary, summary['arxiv_id'])
         
         with tab2:
             st.markdown("### Batch Analysis")
             
             # Process all button
             if st.button("🚀 Process All Papers", use_container_width=True):
-                if st.session_state.summarizer is None:
-                    with st.spinner("🔧 Loading AI models..."):
-                        st.session_state.summarizer = EnhancedResearchPaperSummarizer()
+                summarizer = get_summarizer()
                 
                 progress_bar = st.progress(0)
                 status_text = st.empty()
                 
+                # Summarize first, then score every new summary in one BERT pass.
+                # Progress and the current title share one widget, refreshed at most
+                # every 0.5s (and always on the last paper) to limit frontend traffic.
+                to_score = []
+                num_papers = len(st.session_state.papers)
+                last_update = 0.0
                 for idx, paper in enumerate(st.session_state.papers):
-                    if st.session_state.summaries[idx] is None:
-                        status_text.text(f"Processing paper {idx + 1}/{len(st.session_state.papers)}: {paper['title'][:50]}...")
-                        summary = process_paper(paper, st.session_state.summarizer)
+                    if time.monotonic() - last_update > 0.5 or idx == num_papers - 1:
+                        progress_bar.progress(idx / num_papers, text=f"Processing paper {idx + 1}/{num_papers}: {paper['title'][:50]}...")
+                        last_update = time.monotonic()
+                    if st.session_state.summaries[idx] is None and idx not in st.session_state.futures:
+                        summary = process_paper(paper, summarizer, calculate_bert=False)
                         if summary:
                             st.session_state.summaries[idx] = summary
-                        progress_bar.progress((idx + 1) / len(st.session_state.papers))
+                            if paper.get('summary'):
+                                to_score.append(idx)
+                progress_bar.progress(1.0, text=f"Processed {num_papers}/{num_papers} papers")
+                
+                if to_score and HAS_BERT_SCORE:
+                    status_text.text("📊 Calculating BERT F1 scores...")
+                    batch_scores = calculate_bert_scores_batch(
+                        [st.session_state.summaries[i]['overall_summary'] for i in to_score],
+                        [st.session_state.papers[i]['summary'] for i in to_score]
+                    )
+                    for i, bert_scores in zip(to_score, batch_scores):
+                        if bert_scores:
+                            st.session_state.summaries[i].update(bert_scores)
                 
                 status_text.text("✅ All papers processed!")
                 st.success("Batch processing complete!")
@@ -871,30 +923,45 @@ def main():
                 st.markdown("---")
                 st.markdown("### 📊 Comparative Analysis")
                 
-                # Create comparison dataframe
-                comparison_data = []
-                for summary in processed_summaries:
-                    row = {
-                        'Title': summary['title'][:50] + '...',
-                        'Words (Original)': summary['num_words_original'],
-                        'Words (Summary)': summary['num_words_summary'],
-                        'Compression %': f"{(1 - summary['num_words_summary'] / summary['num_words_original']) * 100:.1f}%",
-                        'Sections': len(summary['sections_found']),
-                        'Keywords': len(summary['overall_keywords']),
-                        'Datasets': len(summary['entities']['datasets']),
-                        'Models': len(summary['entities']['models'])
-                    }
-                    # Add BERT F1 if available
-                    if 'f1' in summary:
-                        row['BERT F1'] = f"{summary['f1']:.3f}"
-                    comparison_data.append(row)
+                # Create comparison dataframe column-wise with numeric dtypes
+                import numpy as np
+                import pandas as pd
+                
+                def column(key, dtype=np.int32):
+                    return np.fromiter((key(s) for s in processed_summaries), dtype=dtype, count=len(processed_summaries))
                 
-                df = pd.DataFrame(comparison_data)
-                st.dataframe(df, use_container_width=True)
+                words_original = column(lambda s: s['num_words_original'])
+                words_summary = column(lambda s: s['num_words_summary'])
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    compression = ((1 - words_summary / words_original) * 100).astype(np.float32)
+                
+                df = pd.DataFrame({
+                    'Title': [s['title'][:50] + '...' for s in processed_summaries],
+                    'Words (Original)': words_original,
+                    'Words (Summary)': words_summary,
+                    'Compression %': compression,
+                    'Sections': column(lambda s: len(s['sections_found'])),
+                    'Keywords': column(lambda s: len(s['overall_keywords'])),
+                    'Datasets': column(lambda s: len(s['entities']['datasets'])),
+                    'Models': column(lambda s: len(s['entities']['models'])),
+                })
+                # Add BERT F1 if available
+                if any('f1' in s for s in processed_summaries):
+                    df['BERT F1'] = column(lambda s: s.get('f1', np.nan), dtype=np.float32)
+                
+                st.dataframe(
+                    df,
+                    use_container_width=True,
+                    column_config={
+                        'Compression %': st.column_config.NumberColumn(format="%.1f%%"),
+                        'BERT F1': st.column_config.NumberColumn(format="%.3f"),
+                    }
+                )
                 
                 # Export all summaries
                 if st.button("📥 Export All Summaries", use_container_width=True):
-                    all_summaries_json = json.dumps(processed_summaries, indent=2)
+                    import orjson
+                    all_summaries_json = orjson.dumps(processed_summaries, option=orjson.OPT_INDENT_2)
                     st.download_button(
                         label="Download All (JSON)",
                         data=all_summaries_json,
@@ -9,22 +9,31 @@ Professional REST API with endpoints for:
 """
 
 from flask import Flask, request, jsonify, send_file
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from flask_compress import Compress
+from cachetools import TTLCache
 from werkzeug.utils import secure_filename
 import os
-import json
+import functools
+import hashlib
+import mmap
+import multiprocessing
+import orjson
 import traceback
 from pathlib import Path
-import tempfile
+import io
 from datetime import datetime
 import threading
 import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 # Import authentication routes
 from auth.routes import auth_bp
 from routes.summaries import summaries_bp
 from routes.process_paper import process_bp
 from routes.profile import profile_bp
+from summarizer import get_summarizer, gpu_semaphore
 
 # Import from main.py
 import sys
@@ -38,9 +47,41 @@ from main import (
     HierarchicalSummarizer
 )
 
+class OrjsonProvider(DefaultJSONProvider):
+    """Serve jsonify()/request.get_json() through orjson.
+    
+    Types orjson can't encode natively fall back to Flask's default hook.
+    """
+    
+    def _dumpb(self, obj):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS)
+    
+    def dumps(self, obj, **kwargs):
+        return self._dumpb(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response instead of
+        # round-tripping them through str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumpb(obj) + b'\n', mimetype=self.mimetype)
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)  # Enable CORS for React frontend
 
+# Compress JSON responses (profiles, summaries, listings); PDFs and exports
+# are sent as-is
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_LEVEL'] = 5
+app.config['COMPRESS_BR_LEVEL'] = 5
+app.config['COMPRESS_MIN_SIZE'] = 256
+Compress(app)
+
 # Register blueprints for authentication and user routes
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(summaries_bp, url_prefix='/api')
@@ -51,31 +92,197 @@ app.register_blueprint(profile_bp, url_prefix='/api')
 UPLOAD_FOLDER = Path('uploads')
 SUMMARIES_FOLDER = Path('summaries_api')
 ARXIV_FOLDER = Path('arxiv_papers')
-ALLOWED_EXTENSIONS = {'pdf'}
+SUMMARIES_INDEX = SUMMARIES_FOLDER / 'index.jsonl'
+HASH_INDEX_FOLDER = SUMMARIES_FOLDER / '_hash_index'
+ALLOWED_EXT_SUFFIXES = ('.pdf',)
 
 UPLOAD_FOLDER.mkdir(exist_ok=True)
 SUMMARIES_FOLDER.mkdir(exist_ok=True)
+HASH_INDEX_FOLDER.mkdir(exist_ok=True)
 ARXIV_FOLDER.mkdir(exist_ok=True)
 
+# One fetcher for all searches so its HTTP session and connection pool are reused
+arxiv_fetcher = ArxivDatasetFetcher(save_dir=str(ARXIV_FOLDER))
+
 app.config['UPLOAD_FOLDER'] = str(UPLOAD_FOLDER)
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max file size
 
-# Global state for summarizer (singleton pattern)
-summarizer = None
-processing_status = {}
+batch_executor = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+# PDF parsing is pure-Python/PyMuPDF work that holds the GIL, so it runs in
+# worker processes. Spawned rather than forked: the parent holds CUDA state
+# and model threads that must not be copied into the children.
+cpu_pool = ProcessPoolExecutor(
+    max_workers=max(1, (os.cpu_count() or 2) - 1),
+    mp_context=multiprocessing.get_context('spawn')
+)
+# Async task states; bounded and expiring so abandoned tasks don't leak.
+# TTLCache isn't thread-safe, so every access goes through _status_lock.
+processing_status = TTLCache(maxsize=1024, ttl=3600)
+_status_lock = threading.Lock()
+_index_lock = threading.Lock()
+# PDF content hashes keyed on (path, mtime, size), filled by uploads and
+# first summarize calls so a PDF isn't re-read just to hash it
+_digest_memo = TTLCache(maxsize=1024, ttl=3600)
+_digest_lock = threading.Lock()
+
+
+def update_status(task_id, **fields):
+    """Update an async task's status; a no-op if the task has been evicted."""
+    with _status_lock:
+        status = processing_status.get(task_id)
+        if status is not None:
+            status.update(fields)
+
+
+def _read_json(path):
+    """Parse a JSON file straight from a read-only mmap of it."""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as mv:
+            return orjson.loads(mv)
+
+
+@functools.lru_cache(maxsize=256)
+def _load_summary(path: str, mtime_ns: int):
+    """Parse a saved summary; keyed on mtime so rewritten files are re-read.
+    
+    The returned dict is shared between callers and must not be mutated.
+    """
+    return _read_json(path)
+
+
+def _listing_entry(summary_id: str, data: dict):
+    """Projection of a saved summary used by list_summaries."""
+    return {
+        'summary_id': summary_id,
+        'title': data.get('title'),
+        'authors': data.get('authors', [])[:3],
+        'arxiv_id': data.get('arxiv_id'),
+        'published': data.get('published'),
+        'sections': len(data.get('sections_found', []))
+    }
+
+
+@functools.lru_cache(maxsize=1024)
+def _summary_listing(path: str, mtime_ns: int):
+    """Listing entry for one summary file, cached on (path, mtime).
+    
+    Cached separately so listing doesn't pin every full summary in memory.
+    """
+    data = _read_json(path)
+    return _listing_entry(Path(path).stem.replace('summary_', ''), data)
+
+
+def _rebuild_summaries_index():
+    """Recreate index.jsonl from the summary files on disk (caller holds _index_lock)."""
+    tmp_path = SUMMARIES_INDEX.with_suffix('.jsonl.part')
+    with open(tmp_path, 'wb') as f, os.scandir(SUMMARIES_FOLDER) as entries:
+        for entry in entries:
+            if entry.name.startswith('summary_') and entry.name.endswith('.json'):
+                f.write(orjson.dumps(_summary_listing(entry.path, entry.stat().st_mtime_ns)) + b'\n')
+    os.replace(tmp_path, SUMMARIES_INDEX)
+
+
+def read_summaries_index():
+    """Return the listing entries for all saved summaries, in save order."""
+    with _index_lock:
+        if not SUMMARIES_INDEX.exists():
+            _rebuild_summaries_index()
+        data = SUMMARIES_INDEX.read_bytes()
+    return [orjson.loads(line) for line in data.splitlines() if line]
 
 
-def get_summarizer():
-    """Get or create summarizer instance."""
-    global summarizer
-    if summarizer is None:
-        summarizer = EnhancedResearchPaperSummarizer()
-    return summarizer
+def save_summary(summary_data: dict, digest: str = None) -> str:
+    """Write a summary to SUMMARIES_FOLDER and add it to the index; returns its id.
+    
+    With a PDF digest, the summary is also recorded as the cached result for
+    that PDF content (see summarize_with_cache).
+    """
+    summary_id = str(uuid.uuid4())
+    summary_file = SUMMARIES_FOLDER / f"summary_{summary_id}.json"
+    with open(summary_file, 'wb') as f:
+        f.write(orjson.dumps(summary_data, option=orjson.OPT_INDENT_2))
+    
+    with _index_lock:
+        if SUMMARIES_INDEX.exists():
+            with open(SUMMARIES_INDEX, 'ab') as f:
+                f.write(orjson.dumps(_listing_entry(summary_id, summary_data)) + b'\n')
+        else:
+            _rebuild_summaries_index()
+    
+    if digest:
+        # A pointer file rather than a symlink: symlinks need extra privileges on Windows
+        (HASH_INDEX_FOLDER / f"{digest}.txt").write_text(summary_id, encoding='utf-8')
+    return summary_id
+
+
+def read_summary(summary_file: Path):
+    """Load a saved summary through the (path, mtime) cache."""
+    return _load_summary(str(summary_file), summary_file.stat().st_mtime_ns)
+
+
+def _digest_key(pdf_path):
+    stat = os.stat(pdf_path)
+    return (os.path.abspath(pdf_path), stat.st_mtime_ns, stat.st_size)
+
+
+def remember_digest(pdf_path, digest: str):
+    """Record a hash computed elsewhere (e.g. while the upload was written)."""
+    with _digest_lock:
+        _digest_memo[_digest_key(pdf_path)] = digest
+
+
+def pdf_digest(pdf_path) -> str:
+    """Content hash of a PDF, used to recognise re-submitted papers."""
+    key = _digest_key(pdf_path)
+    with _digest_lock:
+        digest = _digest_memo.get(key)
+    if digest is not None:
+        return digest
+    
+    h = hashlib.blake2b(digest_size=16)
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _digest_lock:
+        _digest_memo[key] = digest
+    return digest
+
+
+def summarize_with_cache(summ, pdf_path):
+    """Summarize a PDF, reusing the saved summary of an identical PDF if there is one.
+    
+    Returns (summary_data, digest). The caller adds its own metadata on top,
+    so a cache hit with a different title/authors still reports those.
+    """
+    digest = pdf_digest(pdf_path)
+    pointer = HASH_INDEX_FOLDER / f"{digest}.txt"
+    if pointer.exists():
+        summary_file = SUMMARIES_FOLDER / f"summary_{pointer.read_text(encoding='utf-8').strip()}.json"
+        if summary_file.exists():
+            # read_summary's dict is shared; callers only replace top-level keys
+            return dict(read_summary(summary_file)), digest
+    
+    sections = cpu_pool.submit(summ.extract_sections, pdf_path).result()
+    with gpu_semaphore:
+        return summ.summarize_sections(sections), digest
+
+
+def error_response(e, status=500):
+    """JSON error response; call from an except block.
+    
+    The traceback is logged, and only included in the response in debug mode.
+    """
+    app.logger.exception('Request to %s failed', request.path)
+    body = {'error': str(e)}
+    if app.debug:
+        body['traceback'] = traceback.format_exc()
+    return jsonify(body), status
 
 
 def allowed_file(filename):
     """Check if file extension is allowed."""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return filename.lower().endswith(ALLOWED_EXT_SUFFIXES)
 
 
 @app.route('/api/health', methods=['GET'])
@@ -110,14 +317,8 @@ def search_papers():
             }), 400
         
         # Fetch papers
-        fetcher = ArxivDatasetFetcher(
-            query=query,
-            max_results=max_results,
-            save_dir=str(ARXIV_FOLDER)
-        )
-        
-        papers = fetcher.fetch_papers()
-        pdf_paths = fetcher.download_pdfs(papers)
+        papers = arxiv_fetcher.fetch_papers(query=query, max_results=max_results)
+        pdf_paths = arxiv_fetcher.download_pdfs(papers)
         
         # Attach PDF paths
         for paper, pdf_path in zip(papers, pdf_paths):
@@ -130,10 +331,7 @@ def search_papers():
         })
         
     except Exception as e:
-        return jsonify({
-            'error': str(e),
-            'traceback': traceback.format_exc()
-        }), 500
+        return error_response(e)
 
 
 @app.route('/api/upload', methods=['POST'])
@@ -158,20 +356,25 @@ def upload_pdf():
         filename = secure_filename(file.filename)
         file_id = str(uuid.uuid4())
         filepath = UPLOAD_FOLDER / f"{file_id}_{filename}"
-        file.save(filepath)
+        # Stream to disk in 1 MiB chunks, hashing in the same pass
+        h = hashlib.blake2b(digest_size=16)
+        with open(filepath, 'wb', buffering=1 << 20) as out:
+            while chunk := file.stream.read(1 << 20):
+                h.update(chunk)
+                out.write(chunk)
+        file_hash = h.hexdigest()
+        remember_digest(filepath, file_hash)
         
         return jsonify({
             'success': True,
             'file_id': file_id,
             'filename': filename,
-            'filepath': str(filepath)
+            'filepath': str(filepath),
+            'file_hash': file_hash
         })
         
     except Exception as e:
-        return jsonify({
-            'error': str(e),
-            'traceback': traceback.format_exc()
-        }), 500
+        return error_response(e)
 
 
 @app.route('/api/summarize', methods=['POST'])
@@ -196,8 +399,8 @@ def summarize_paper():
         # Get or create summarizer
         summ = get_summarizer()
         
-        # Process paper
-        summary_data = summ.summarize_paper(pdf_path)
+        # Process paper (instant if this exact PDF was summarized before)
+        summary_data, digest = summarize_with_cache(summ, pdf_path)
         
         # Add metadata
         summary_data.update({
@@ -211,10 +414,7 @@ def summarize_paper():
         })
         
         # Save summary
-        summary_id = str(uuid.uuid4())
-        summary_file = SUMMARIES_FOLDER / f"summary_{summary_id}.json"
-        with open(summary_file, 'w', encoding='utf-8') as f:
-            json.dump(summary_data, f, indent=2)
+        summary_id = save_summary(summary_data, digest=digest)
         
         summary_data['summary_id'] = summary_id
         
@@ -224,10 +424,7 @@ def summarize_paper():
         })
         
     except Exception as e:
-        return jsonify({
-            'error': str(e),
-            'traceback': traceback.format_exc()
-        }), 500
+        return error_response(e)
 
 
 @app.route('/api/summarize/async', methods=['POST'])
@@ -246,30 +443,33 @@ def summarize_paper_async():
         task_id = str(uuid.uuid4())
         
         # Initialize status
-        processing_status[task_id] = {
-            'status': 'processing',
-            'progress': 0,
-            'message': 'Starting...',
-            'result': None,
-            'error': None
-        }
+        with _status_lock:
+            processing_status[task_id] = {
+                'status': 'processing',
+                'progress': 0,
+                'message': 'Starting...',
+                'result': None,
+                'error': None
+            }
         
         # Start background thread
         def process_in_background():
             try:
                 summ = get_summarizer()
                 
-                processing_status[task_id].update({
-                    'progress': 20,
-                    'message': 'Extracting sections...'
-                })
+                update_status(
+                    task_id,
+                    progress=20,
+                    message='Extracting sections...'
+                )
                 
-                summary_data = summ.summarize_paper(pdf_path)
+                summary_data, digest = summarize_with_cache(summ, pdf_path)
                 
-                processing_status[task_id].update({
-                    'progress': 80,
-                    'message': 'Finalizing...'
-                })
+                update_status(
+                    task_id,
+                    progress=80,
+                    message='Finalizing...'
+                )
                 
                 # Add metadata
                 summary_data.update({
@@ -283,27 +483,27 @@ def summarize_paper_async():
                 })
                 
                 # Save summary
-                summary_id = str(uuid.uuid4())
-                summary_file = SUMMARIES_FOLDER / f"summary_{summary_id}.json"
-                with open(summary_file, 'w', encoding='utf-8') as f:
-                    json.dump(summary_data, f, indent=2)
+                summary_id = save_summary(summary_data, digest=digest)
                 
                 summary_data['summary_id'] = summary_id
                 
-                processing_status[task_id].update({
-                    'status': 'completed',
-                    'progress': 100,
-                    'message': 'Complete',
-                    'result': summary_data
-                })
+                update_status(
+                    task_id,
+                    status='completed',
+                    progress=100,
+                    message='Complete',
+                    result=summary_data
+                )
                 
             except Exception as e:
-                processing_status[task_id].update({
-                    'status': 'error',
-                    'progress': 0,
-                    'message': str(e),
-                    'error': traceback.format_exc()
-                })
+                app.logger.exception('Async summarization failed')
+                update_status(
+                    task_id,
+                    status='error',
+                    progress=0,
+                    message=str(e),
+                    error=traceback.format_exc() if app.debug else str(e)
+                )
         
         thread = threading.Thread(target=process_in_background)
         thread.daemon = True
@@ -315,37 +515,29 @@ def summarize_paper_async():
         })
         
     except Exception as e:
-        return jsonify({
-            'error': str(e),
-            'traceback': traceback.format_exc()
-        }), 500
+        return error_response(e)
 
 
 @app.route('/api/status/<task_id>', methods=['GET'])
 def get_processing_status(task_id):
     """Get status of async processing task."""
-    if task_id not in processing_status:
-        return jsonify({'error': 'Task not found'}), 404
+    with _status_lock:
+        status = processing_status.get(task_id)
+        if status is None:
+            return jsonify({'error': 'Task not found'}), 404
+        # Final state: free the (large) result once the client has it
+        if status['status'] in ('completed', 'error'):
+            processing_status.pop(task_id, None)
+        status = dict(status)
     
-    return jsonify(processing_status[task_id])
+    return jsonify(status)
 
 
 @app.route('/api/summaries', methods=['GET'])
 def list_summaries():
     """List all saved summaries."""
     try:
-        summaries = []
-        for file in SUMMARIES_FOLDER.glob('summary_*.json'):
-            with open(file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                summaries.append({
-                    'summary_id': file.stem.replace('summary_', ''),
-                    'title': data.get('title'),
-                    'authors': data.get('authors', [])[:3],
-                    'arxiv_id': data.get('arxiv_id'),
-                    'published': data.get('published'),
-                    'sections': len(data.get('sections_found', []))
-                })
+        summaries = read_summaries_index()
         
         return jsonify({
             'success': True,
@@ -354,10 +546,7 @@ def list_summaries():
         })
         
     except Exception as e:
-        return jsonify({
-            'error': str(e),
-            'traceback': traceback.format_exc()
-        }), 500
+        return error_response(e)
 
 
 @app.route('/api/summary/<summary_id>', methods=['GET'])
@@ -369,8 +558,7 @@ def get_summary(summary_id):
         if not summary_file.exists():
             return jsonify({'error': 'Summary not found'}), 404
         
-        with open(summary_file, 'r', encoding='utf-8') as f:
-            summary_data = json.load(f)
+        summary_data = read_summary(summary_file)
         
         return jsonify({
             'success': True,
@@ -378,10 +566,7 @@ def get_summary(summary_id):
         })
         
     except Exception as e:
-        return jsonify({
-            'error': str(e),
-            'traceback': traceback.format_exc()
-        }), 500
+        return error_response(e)
 
 
 @app.route('/api/export/<summary_id>', methods=['GET'])
@@ -397,8 +582,7 @@ def export_summary(summary_id):
         if not summary_file.exists():
             return jsonify({'error': 'Summary not found'}), 404
         
-        with open(summary_file, 'r', encoding='utf-8') as f:
-            summary_data = json.load(f)
+        summary_data = read_summary(summary_file)
         
         if format_type == 'markdown':
             # Convert to markdown
@@ -422,26 +606,46 @@ def export_summary(summary_id):
                 for section, text in summary_data['section_summaries'].items():
                     md += f"### {section.title()}\n\n{text}\n\n"
             
-            # Create temp file
-            temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.md', encoding='utf-8')
-            temp_file.write(md)
-            temp_file.close()
-            
             return send_file(
-                temp_file.name,
+                io.BytesIO(md.encode('utf-8')),
                 as_attachment=True,
                 download_name=f"{summary_data['arxiv_id']}.md",
                 mimetype='text/markdown'
             )
         else:
             # JSON export
-            return jsonify(summary_data)
+            return app.response_class(orjson.dumps(summary_data), mimetype='application/json')
         
     except Exception as e:
-        return jsonify({
+        return error_response(e)
+
+
+def _summarize_batch_paper(summ, paper):
+    """Summarize one paper of a batch; returns its entry in the results list."""
+    try:
+        pdf_path = paper.get('pdf_path')
+        if not pdf_path or not os.path.exists(pdf_path):
+            return {'error': 'Invalid PDF path', 'paper': paper}
+        
+        sections = cpu_pool.submit(summ.extract_sections, pdf_path).result()
+        with gpu_semaphore:
+            summary_data = summ.summarize_sections(sections)
+        summary_data.update({
+            'title': paper.get('title', Path(pdf_path).stem),
+            'authors': paper.get('authors', []),
+            'arxiv_id': paper.get('arxiv_id', 'uploaded'),
+            'published': paper.get('published', datetime.now().strftime('%Y-%m-%d')),
+            'primary_category': paper.get('primary_category', 'Unknown')
+        })
+        
+        return {'success': True, 'summary': summary_data}
+        
+    except Exception as e:
+        return {
+            'success': False,
             'error': str(e),
-            'traceback': traceback.format_exc()
-        }), 500
+            'paper': paper
+        }
 
 
 @app.route('/api/batch/summarize', methods=['POST'])
@@ -464,32 +668,14 @@ def batch_summarize():
             return jsonify({'error': 'No papers provided'}), 400
         
         summ = get_summarizer()
-        results = []
+        results = [None] * len(papers)
         
-        for paper in papers:
-            try:
-                pdf_path = paper.get('pdf_path')
-                if not pdf_path or not os.path.exists(pdf_path):
-                    results.append({'error': 'Invalid PDF path', 'paper': paper})
-                    continue
-                
-                summary_data = summ.summarize_paper(pdf_path)
-                summary_data.update({
-                    'title': paper.get('title', Path(pdf_path).stem),
-                    'authors': paper.get('authors', []),
-                    'arxiv_id': paper.get('arxiv_id', 'uploaded'),
-                    'published': paper.get('published', datetime.now().strftime('%Y-%m-%d')),
-                    'primary_category': paper.get('primary_category', 'Unknown')
-                })
-                
-                results.append({'success': True, 'summary': summary_data})
-                
-            except Exception as e:
-                results.append({
-                    'success': False,
-                    'error': str(e),
-                    'paper': paper
-                })
+        futures = {
+            batch_executor.submit(_summarize_batch_paper, summ, paper): i
+            for i, paper in enumerate(papers)
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
         
         return jsonify({
             'success': True,
@@ -500,10 +686,7 @@ def batch_summarize():
         })
         
     except Exception as e:
-        return jsonify({
-            'error': str(e),
-            'traceback': traceback.format_exc()
-        }), 500
+        return error_response(e)
 
 
 @app.errorhandler(413)
@@ -543,4 +726,10 @@ if __name__ == '__main__':
     print("API Documentation: http://localhost:5000/api/health")
     print("="*60)
     
-    app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
+    # Warm the models before the first request
+    print("Loading AI models...")
+    get_summarizer()
+    
+    # Development server only; see wsgi.py for running under gunicorn.
+    # No debug reloader: it would import the app (and load the models) twice.
+    app.run(host='0.0.0.0', port=5000, threaded=True)
@@ -0,0 +1,19 @@
+"""
+Shared Supabase client for every blueprint and the setup script
+"""
+from functools import lru_cache
+from supabase import create_client, ClientOptions
+from database.config import SUPABASE_URL, SUPABASE_SERVICE_KEY
+
+@lru_cache(maxsize=1)
+def get_supabase():
+    """Create the service-role client once per process.
+    
+    The client keeps its PostgREST HTTP session, so requests made through it
+    reuse pooled keep-alive connections instead of a new TLS handshake each.
+    """
+    return create_client(
+        SUPABASE_URL,
+        SUPABASE_SERVICE_KEY,
+        options=ClientOptions(postgrest_client_timeout=10)
+    )
@@ -0,0 +1,14 @@
+"""
+Short-lived /me cache shared by the auth and profile blueprints
+"""
+import threading
+from cachetools import TTLCache
+
+# user_id -> (user, stats); the frontend calls /me on every navigation
+me_cache = TTLCache(maxsize=10000, ttl=45)
+me_cache_lock = threading.RLock()
+
+def invalidate_me_user(user_id):
+    """Drop a user's cached /me response; call after any write to their users row"""
+    with me_cache_lock:
+        me_cache.pop(user_id, None)
@@ -1,27 +1,45 @@
 """
 Authentication routes for user signup, login, and profile management
 """
+import atexit
 from flask import Blueprint, request, jsonify
-from supabase import create_client
-from database.config import SUPABASE_URL, SUPABASE_KEY, SUPABASE_SERVICE_KEY
+from auth._client import get_supabase
+from auth._me_cache import me_cache, me_cache_lock, invalidate_me_user
 from auth.utils import (
-    hash_password, 
-    verify_password, 
+    hash_password_in_pool,
+    verify_password_in_pool,
+    password_needs_rehash,
     create_access_token,
+    DUMMY_HASH,
     token_required,
     validate_email,
-    validate_password_strength
+    validate_password_strength,
+    limit_json_body,
+    json_body
 )
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 auth_bp = Blueprint('auth', __name__)
-supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+auth_bp.before_request(limit_json_body)
+supabase = get_supabase()
+
+# Writes the response doesn't depend on, run after the request returns
+_BG = ThreadPoolExecutor(max_workers=4, thread_name_prefix='auth-bg')
+atexit.register(lambda: _BG.shutdown(wait=False))
+
+def _touch_last_login(user_id, password, password_hash):
+    """Stamp last_login, upgrading legacy bcrypt hashes while we have the password"""
+    try:
+        new_hash = hash_password_in_pool(password) if password_needs_rehash(password_hash) else None
+        supabase.rpc('touch_last_login', {'p_user_id': user_id, 'p_password_hash': new_hash}).execute()
+    except Exception as e:
+        print(f"⚠️ Failed to update last login for {user_id}: {type(e).__name__}: {e}")
 
 @auth_bp.route('/signup', methods=['POST'])
 def signup():
     """Register a new user"""
     try:
-        data = request.get_json()
+        data = json_body()
         
         email = data.get('email', '').strip().lower()
         password = data.get('password', '')
@@ -38,32 +56,18 @@ def signup():
         if not is_valid:
             return jsonify({'error': error_msg}), 400
         
-        # Check if user exists
-        try:
-            existing_user = supabase.table('users').select('id').eq('email', email).execute()
-        except Exception as check_error:
-            print(f"⚠️ Error checking existing user: {check_error}")
-            # User might not exist, continue anyway
-            existing_user = type('obj', (object,), {'data': []})()
-        
-        if existing_user.data:
-            return jsonify({'error': 'Email already registered'}), 409
-        
-        # Hash password and create user
-        password_hash = hash_password(password)
-        
-        user_data = {
-            'email': email,
-            'password_hash': password_hash,
-            'full_name': full_name,
-            'created_at': datetime.utcnow().isoformat(),
-            'is_active': True
-        }
+        # Hash password and create user; the insert itself detects a taken
+        # email, so there's no separate existence check to race against
+        password_hash = hash_password_in_pool(password)
         
-        result = supabase.table('users').insert(user_data).execute()
+        result = supabase.rpc('signup_user', {
+            'p_email': email,
+            'p_password_hash': password_hash,
+            'p_full_name': full_name
+        }).execute()
         
         if not result.data:
-            return jsonify({'error': 'Failed to create user'}), 500
+            return jsonify({'error': 'Email already registered'}), 409
         
         user = result.data[0]
         
@@ -91,7 +95,7 @@ def signup():
 def login():
     """Authenticate a user and return access token"""
     try:
-        data = request.get_json()
+        data = json_body()
         email = data.get('email', '').strip().lower()
         password = data.get('password', '')
         
@@ -99,25 +103,22 @@ def login():
             return jsonify({'error': 'Email and password are required'}), 400
         
         # Get user from database
-        result = supabase.table('users').select('*').eq('email', email).execute()
+        result = supabase.table('users').select('id, email, password_hash, is_active, full_name, bio, avatar_url, created_at').eq('email', email).execute()
         
-        if not result.data:
-            return jsonify({'error': 'Invalid email or password'}), 401
+        user = result.data[0] if result.data else None
         
-        user = result.data[0]
+        # Always verify, against a dummy hash for unknown emails, so both
+        # failure cases take the same time
+        password_ok = verify_password_in_pool(password, user['password_hash'] if user else DUMMY_HASH)
+        if not (user and password_ok):
+            return jsonify({'error': 'Invalid email or password'}), 401
         
         # Check if account is active
         if not user.get('is_active', True):
             return jsonify({'error': 'Account is deactivated'}), 403
         
-        # Verify password
-        if not verify_password(password, user['password_hash']):
-            return jsonify({'error': 'Invalid email or password'}), 401
-        
-        # Update last login
-        supabase.table('users').update({
-            'last_login': datetime.utcnow().isoformat()
-        }).eq('id', user['id']).execute()
+        # Update last login in the background; the token doesn't depend on it
+        _BG.submit(_touch_last_login, user['id'], password, user['password_hash'])
         
         # Create access token
         token = create_access_token(user['id'], user['email'])
@@ -143,16 +144,23 @@ def login():
 def get_current_user():
     """Get current authenticated user's profile"""
     try:
-        result = supabase.table('users').select('id, email, full_name, bio, avatar_url, created_at, last_login').eq('id', request.user_id).execute()
-        
-        if not result.data:
-            return jsonify({'error': 'User not found'}), 404
-        
-        user = result.data[0]
-        
-        # Get user statistics
-        stats_result = supabase.table('user_summary_stats').select('*').eq('user_id', request.user_id).execute()
-        stats = stats_result.data[0] if stats_result.data else {}
+        user_id = request.user_id
+        with me_cache_lock:
+            cached = me_cache.get(user_id)
+        
+        if cached is not None:
+            user, stats = cached
+        else:
+            # Profile and statistics in one round trip
+            result = supabase.rpc('me_bundle', {'p_uid': user_id}).execute()
+            
+            if not result.data:
+                return jsonify({'error': 'User not found'}), 404
+            
+            user = result.data['user']
+            stats = result.data['stats'] or {}
+            with me_cache_lock:
+                me_cache[user_id] = (user, stats)
         
         return jsonify({
             'user': user,
@@ -173,7 +181,7 @@ def get_current_user():
 def update_profile():
     """Update current user's profile"""
     try:
-        data = request.get_json()
+        data = json_body()
         
         # Only allow updating certain fields
         allowed_fields = ['full_name', 'bio', 'avatar_url']
@@ -182,13 +190,13 @@ def update_profile():
         if not update_data:
             return jsonify({'error': 'No valid fields to update'}), 400
         
-        update_data['updated_at'] = datetime.utcnow().isoformat()
-        
         result = supabase.table('users').update(update_data).eq('id', request.user_id).execute()
         
         if not result.data:
             return jsonify({'error': 'Failed to update profile'}), 500
         
+        invalidate_me_user(request.user_id)
+        
         return jsonify({
             'message': 'Profile updated successfully',
             'user': result.data[0]
@@ -202,7 +210,7 @@ def update_profile():
 def change_password():
     """Change user's password"""
     try:
-        data = request.get_json()
+        data = json_body()
         current_password = data.get('current_password', '')
         new_password = data.get('new_password', '')
         
@@ -223,16 +231,20 @@ def change_password():
         user = result.data[0]
         
         # Verify current password
-        if not verify_password(current_password, user['password_hash']):
+        if not verify_password_in_pool(current_password, user['password_hash']):
             return jsonify({'error': 'Current password is incorrect'}), 401
         
-        # Hash new password and update
-        new_password_hash = hash_password(new_password)
-        
-        supabase.table('users').update({
-            'password_hash': new_password_hash,
-            'updated_at': datetime.utcnow().isoformat()
-        }).eq('id', request.user_id).execute()
+        # Hash new password and swap it in, unless it changed since we read it
+        new_password_hash = hash_password_in_pool(new_password)
+        
+        swap = supabase.rpc('change_password_rpc', {
+            'p_uid': request.user_id,
+            'p_old_hash': user['password_hash'],
+            'p_new_hash': new_password_hash
+        }).execute()
+        if not swap.data:
+            return jsonify({'error': 'Password was changed concurrently, please retry'}), 409
+        invalidate_me_user(request.user_id)
         
         return jsonify({'message': 'Password changed successfully'}), 200
         
@@ -3,18 +3,18 @@ Supabase Auth integration - uses Supabase's built-in authentication
 instead of custom JWT tokens
 """
 from flask import Blueprint, request, jsonify
-from supabase import create_client
-from database.config import SUPABASE_URL, SUPABASE_SERVICE_KEY
-from datetime import datetime
+from auth._client import get_supabase
+from auth.utils import limit_json_body, json_body
 
 supabase_auth_bp = Blueprint('supabase_auth', __name__)
-supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+supabase_auth_bp.before_request(limit_json_body)
+supabase = get_supabase()
 
 @supabase_auth_bp.route('/signup', methods=['POST'])
 def signup_with_email():
     """Sign up with email verification"""
     try:
-        data = request.get_json()
+        data = json_body()
         email = data.get('email', '').strip().lower()
         password = data.get('password', '')
         full_name = data.get('full_name', '').strip()
@@ -40,7 +40,6 @@ def signup_with_email():
                 'id': auth_response.user.id,
                 'email': email,
                 'full_name': full_name,
-                'created_at': datetime.utcnow().isoformat(),
                 'is_active': True
             }).execute()
             
@@ -66,7 +65,7 @@ def signup_with_email():
 def login_with_email():
     """Login with email and password"""
     try:
-        data = request.get_json()
+        data = json_body()
         email = data.get('email', '').strip().lower()
         password = data.get('password', '')
         
@@ -81,9 +80,7 @@ def login_with_email():
         
         if auth_response.user and auth_response.session:
             # Update last login
-            supabase.table('users').update({
-                'last_login': datetime.utcnow().isoformat()
-            }).eq('id', auth_response.user.id).execute()
+            supabase.rpc('touch_last_login', {'p_user_id': auth_response.user.id}).execute()
             
             return jsonify({
                 'message': 'Login successful',
@@ -109,7 +106,7 @@ def login_with_email():
 def verify_email():
     """Verify email with token"""
     try:
-        data = request.get_json()
+        data = json_body()
         token_hash = data.get('token_hash')
         type = data.get('type', 'email')
         
@@ -141,7 +138,7 @@ def verify_email():
 def resend_verification():
     """Resend verification email"""
     try:
-        data = request.get_json()
+        data = json_body()
         email = data.get('email', '').strip().lower()
         
         if not email:
@@ -166,7 +163,7 @@ def resend_verification():
 def forgot_password():
     """Send password reset email"""
     try:
-        data = request.get_json()
+        data = json_body()
         email = data.get('email', '').strip().lower()
         
         if not email:
@@ -187,7 +184,7 @@ def forgot_password():
 def reset_password():
     """Reset password with token"""
     try:
-        data = request.get_json()
+        data = json_body()
         access_token = data.get('access_token')
         new_password = data.get('new_password')
         
@@ -1,41 +1,221 @@
 """
 Authentication utilities for JWT and password hashing
 """
+import atexit
+import base64
+import binascii
+import hashlib
+import hmac
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
 import jwt
+import orjson
 import bcrypt
-from datetime import datetime, timedelta
-from functools import wraps
-from flask import request, jsonify
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError, InvalidHashError
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import wraps, lru_cache
+from flask import request, jsonify, abort, g
 from database.config import JWT_SECRET_KEY, JWT_ALGORITHM, JWT_ACCESS_TOKEN_EXPIRES
 
+# Argon2id with the OWASP-recommended parameters
+_ph = PasswordHasher(time_cost=2, memory_cost=46 * 1024, parallelism=1, hash_len=32)
+
+# argon2 hashes the whole password (bcrypt silently stopped at 72 bytes), so
+# cap the length to bound the work a single request can cause
+MAX_PASSWORD_LENGTH = 128
+
+def _is_bcrypt_hash(hashed: str) -> bool:
+    return hashed.startswith(('$2a$', '$2b$', '$2y$'))
+
 def hash_password(password: str) -> str:
-    """Hash a password using bcrypt"""
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+    """Hash a password using argon2id"""
+    if len(password) > MAX_PASSWORD_LENGTH:
+        raise ValueError('Password too long')
+    return _ph.hash(password)
 
 def verify_password(password: str, hashed: str) -> bool:
-    """Verify a password against its hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    """Verify a password against its hash (argon2id, or a legacy bcrypt hash)"""
+    if _is_bcrypt_hash(hashed):
+        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    try:
+        return _ph.verify(hashed, password)
+    except (VerifyMismatchError, InvalidHashError):
+        return False
+
+# Verified against when the email doesn't exist, so unknown and known emails
+# cost the same hash and can't be told apart by response time
+DUMMY_HASH = hash_password('x' * 12)
+
+def password_needs_rehash(hashed: str) -> bool:
+    """Whether a stored hash is bcrypt or uses outdated argon2 parameters"""
+    return _is_bcrypt_hash(hashed) or _ph.check_needs_rehash(hashed)
+
+@lru_cache(maxsize=1)
+def _hash_pool() -> ProcessPoolExecutor:
+    """Worker processes for password hashing, started on first use.
+    
+    Bounds how many 46 MiB argon2 hashes run at once and keeps the CPU work
+    off the request threads.
+    """
+    # Spawned, not forked: the first login starts it from a threaded worker
+    pool = ProcessPoolExecutor(
+        max_workers=max(2, (os.cpu_count() or 2) // 2),
+        mp_context=multiprocessing.get_context("spawn")
+    )
+    atexit.register(pool.shutdown)
+    return pool
+
+def hash_password_in_pool(password: str) -> str:
+    """hash_password, run in the hashing pool"""
+    return _hash_pool().submit(hash_password, password).result()
+
+# In-flight verifications, so identical concurrent logins share one hash.
+# Only running verifications are kept; results are never cached.
+_INFLIGHT: dict[bytes, Future] = {}
+_inflight_lock = threading.Lock()
+
+def verify_password_in_pool(password: str, hashed: str) -> bool:
+    """verify_password, run in the hashing pool"""
+    key = hashlib.sha256(f"{hashed}:{password}".encode('utf-8')).digest()
+    with _inflight_lock:
+        future = _INFLIGHT.get(key)
+        leader = future is None
+        if leader:
+            future = _hash_pool().submit(verify_password, password, hashed)
+            _INFLIGHT[key] = future
+    if leader:
+        # Outside the lock: the callback runs inline if the hash already finished
+        future.add_done_callback(lambda _: _discard_inflight(key))
+    return future.result()
+
+def _discard_inflight(key: bytes):
+    with _inflight_lock:
+        _INFLIGHT.pop(key, None)
+
+# Tokens are signed/verified directly: the key bytes and the encoded headers
+# are prepared once instead of on every PyJWT call. New tokens use a keyed
+# BLAKE2b MAC (a single pass, no HMAC ipad/opad); HS256 is still accepted so
+# tokens issued before the switch stay valid until they expire. Algorithms
+# outside _MACS go through PyJWT.
+_MAC_KEY = JWT_SECRET_KEY.encode('utf-8')
+# blake2b keys are at most 64 bytes
+_BLAKE2B_KEY = _MAC_KEY if len(_MAC_KEY) <= 64 else hashlib.blake2b(_MAC_KEY).digest()
+
+_MACS = {
+    'HS256': lambda msg: hmac.new(_MAC_KEY, msg, hashlib.sha256).digest(),
+    'BLAKE2B': lambda msg: hashlib.blake2b(msg, key=_BLAKE2B_KEY, digest_size=32).digest(),
+}
+
+def _b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+def _b64url_decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+_HEADERS_B64 = {alg: _b64url_encode(orjson.dumps({'alg': alg, 'typ': 'JWT'})) for alg in _MACS}
+
+def _encode_mac(payload: dict, alg: str) -> str:
+    signing_input = _HEADERS_B64[alg] + b'.' + _b64url_encode(orjson.dumps(payload))
+    signature = _MACS[alg](signing_input)
+    return (signing_input + b'.' + _b64url_encode(signature)).decode('ascii')
+
+def _decode_mac(token: str) -> dict:
+    try:
+        header_b64, payload_b64, signature_b64 = token.encode('ascii').split(b'.')
+        header = orjson.loads(_b64url_decode(header_b64))
+        signature = _b64url_decode(signature_b64)
+    except (ValueError, binascii.Error, orjson.JSONDecodeError):
+        raise Exception('Invalid token')
+    
+    # Only accept what we issue; rejects alg=none and algorithm confusion
+    mac = _MACS.get(header.get('alg')) if isinstance(header, dict) else None
+    if mac is None:
+        raise Exception('Invalid token')
+    
+    expected = mac(header_b64 + b'.' + payload_b64)
+    if not hmac.compare_digest(expected, signature):
+        raise Exception('Invalid token')
+    
+    try:
+        payload = orjson.loads(_b64url_decode(payload_b64))
+    except (ValueError, binascii.Error, orjson.JSONDecodeError):
+        raise Exception('Invalid token')
+    if not isinstance(payload, dict) or not isinstance(payload.get('exp'), (int, float)):
+        raise Exception('Invalid token')
+    if time.time() >= payload['exp']:
+        raise Exception('Token has expired')
+    return payload
 
 def create_access_token(user_id: str, email: str) -> str:
     """Create a JWT access token"""
+    now = int(time.time())
     payload = {
         'user_id': user_id,
         'email': email,
-        'exp': datetime.utcnow() + timedelta(seconds=JWT_ACCESS_TOKEN_EXPIRES),
-        'iat': datetime.utcnow()
+        'exp': now + JWT_ACCESS_TOKEN_EXPIRES,
+        'iat': now
     }
+    if JWT_ALGORITHM in _MACS:
+        return _encode_mac(payload, JWT_ALGORITHM)
     return jwt.encode(payload, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
 
+# Verified tokens -> (payload, exp), so repeat requests skip the MAC check
+_TOKEN_CACHE: OrderedDict[str, tuple[dict, float]] = OrderedDict()
+_TOKEN_CACHE_MAX = 4096
+_token_cache_lock = threading.Lock()
+
 def decode_access_token(token: str) -> dict:
     """Decode and validate a JWT token"""
-    try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        return payload
-    except jwt.ExpiredSignatureError:
-        raise Exception('Token has expired')
-    except jwt.InvalidTokenError:
-        raise Exception('Invalid token')
+    with _token_cache_lock:
+        cached = _TOKEN_CACHE.get(token)
+        if cached is not None:
+            payload, exp = cached
+            if time.time() < exp:
+                _TOKEN_CACHE.move_to_end(token)
+                return payload
+            del _TOKEN_CACHE[token]
+            raise Exception('Token has expired')
+    
+    if JWT_ALGORITHM in _MACS:
+        payload = _decode_mac(token)
+    else:
+        try:
+            payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+        except jwt.ExpiredSignatureError:
+            raise Exception('Token has expired')
+        except jwt.InvalidTokenError:
+            raise Exception('Invalid token')
+    
+    with _token_cache_lock:
+        _TOKEN_CACHE[token] = (payload, payload['exp'])
+        if len(_TOKEN_CACHE) > _TOKEN_CACHE_MAX:
+            _TOKEN_CACHE.popitem(last=False)
+    return payload
+
+# Auth bodies are a handful of short fields
+MAX_JSON_BODY_BYTES = 4096
+
+def limit_json_body():
+    """Blueprint before_request hook: reject oversized bodies with a 413
+    
+    The body is read here, never more than one byte past the limit, so a
+    chunked request without a Content-Length is capped too.
+    """
+    if request.content_length is not None and request.content_length > MAX_JSON_BODY_BYTES:
+        abort(413)
+    body = request.stream.read(MAX_JSON_BODY_BYTES + 1)
+    if len(body) > MAX_JSON_BODY_BYTES:
+        abort(413)
+    g.json_body = body
+
+def json_body() -> dict:
+    """Parse the body limit_json_body read with orjson, without Flask's MIME checks"""
+    return orjson.loads(g.get('json_body') or b'{}')
 
 def token_required(f):
     """Decorator to protect routes that require authentication"""
@@ -66,27 +246,42 @@ def token_required(f):
     
     return decorated
 
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
 def validate_email(email: str) -> bool:
     """Basic email validation"""
-    import re
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return _EMAIL_RE.match(email) is not None
 
 def validate_password_strength(password: str) -> tuple[bool, str]:
     """
     Validate password strength
     Returns: (is_valid, error_message)
+    
+    Passwords over MAX_PASSWORD_LENGTH are rejected up front, which also
+    bounds the character scan below.
     """
     if len(password) < 8:
         return False, 'Password must be at least 8 characters long'
     
-    if not any(c.isupper() for c in password):
+    if len(password) > MAX_PASSWORD_LENGTH:
+        return False, f'Password must be at most {MAX_PASSWORD_LENGTH} characters long'
+    
+    # One pass over the distinct characters, stopping once all classes are seen
+    has_upper = has_lower = has_digit = False
+    for c in set(password):
+        has_upper = has_upper or c.isupper()
+        has_lower = has_lower or c.islower()
+        has_digit = has_digit or c.isdigit()
+        if has_upper and has_lower and has_digit:
+            break
+    
+    if not has_upper:
         return False, 'Password must contain at least one uppercase letter'
     
-    if not any(c.islower() for c in password):
+    if not has_lower:
         return False, 'Password must contain at least one lowercase letter'
     
-    if not any(c.isdigit() for c in password):
+    if not has_digit:
         return False, 'Password must contain at least one number'
     
     return True, ''
@@ -15,15 +15,19 @@ SUPABASE_KEY = os.getenv('SUPABASE_ANON_KEY', '')  # For client-side operations
 SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_KEY', '')  # For admin operations
 
 # PostgreSQL Direct Connection (optional, for SQLAlchemy)
+# Prefer the Supabase pooler in transaction mode (port 6543) over a direct
+# connection on 5432, e.g.
+# postgresql://postgres.<ref>:<password>@aws-0-<region>.pooler.supabase.com:6543/postgres
 DATABASE_URL = os.getenv('DATABASE_URL', '')
 
 # JWT Configuration
 JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
-JWT_ALGORITHM = 'HS256'
+JWT_ALGORITHM = 'BLAKE2B'  # keyed BLAKE2b MAC; HS256 tokens are still accepted
 JWT_ACCESS_TOKEN_EXPIRES = 24 * 60 * 60  # 24 hours in seconds
 
 # Database connection settings
 DB_POOL_SIZE = 10
 DB_MAX_OVERFLOW = 20
 DB_POOL_TIMEOUT = 30
-DB_POOL_RECYCLE = 3600
+DB_POOL_RECYCLE = 1800  # recycle before the pooler drops idle server connections
+DB_POOL_PRE_PING = True
@@ -7,7 +7,7 @@ CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 -- Users table
 CREATE TABLE users (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-    email VARCHAR(255) UNIQUE NOT NULL,
+    email VARCHAR(255) UNIQUE NOT NULL CHECK (email = lower(email)),
     password_hash VARCHAR(255) NOT NULL,
     full_name VARCHAR(255),
     bio TEXT,
@@ -35,6 +35,9 @@ CREATE TABLE summaries (
     processing_time_seconds DECIMAL(10, 2),
     word_count INTEGER,
     
+    -- Reuse key: blake2b of the uploaded PDF, or arxiv:<id>v<n>
+    cache_key TEXT,
+    
     -- Timestamps
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
@@ -52,10 +55,22 @@ CREATE TABLE user_activity (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Abstract embeddings for near-duplicate summary reuse (see semantic_cache.py)
+CREATE TABLE summary_embeddings (
+    summary_id UUID PRIMARY KEY REFERENCES summaries(id) ON DELETE CASCADE,
+    embedding REAL[] NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
 -- Create indexes for performance
+-- Routes lowercase email before every lookup; the CHECK above keeps stored
+-- values in the same form so this index matches both eq('email') and lower(email)
+CREATE UNIQUE INDEX IF NOT EXISTS users_email_lower_idx ON users ((lower(email)));
 CREATE INDEX idx_summaries_user_id ON summaries(user_id);
 CREATE INDEX idx_summaries_created_at ON summaries(created_at DESC);
+CREATE INDEX idx_summaries_user_created_at ON summaries(user_id, created_at DESC, id DESC);
 CREATE INDEX idx_summaries_arxiv_id ON summaries(arxiv_id);
+CREATE INDEX idx_summaries_cache_key ON summaries(cache_key, created_at DESC);
 CREATE INDEX idx_user_activity_user_id ON user_activity(user_id);
 CREATE INDEX idx_user_activity_created_at ON user_activity(created_at DESC);
 CREATE INDEX idx_summaries_search ON summaries USING GIN(search_vector);
@@ -91,6 +106,67 @@ CREATE TRIGGER update_summaries_updated_at
     BEFORE UPDATE ON summaries
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Stamp last_login server-side; optionally store an upgraded password hash
+CREATE OR REPLACE FUNCTION touch_last_login(p_user_id UUID, p_password_hash TEXT DEFAULT NULL)
+RETURNS VOID AS $$
+    UPDATE users
+    SET last_login = CURRENT_TIMESTAMP,
+        password_hash = COALESCE(p_password_hash, password_hash)
+    WHERE id = p_user_id;
+$$ LANGUAGE sql;
+
+-- Replace a password hash only if it is still the one that was verified
+CREATE OR REPLACE FUNCTION change_password_rpc(p_uid UUID, p_old_hash TEXT, p_new_hash TEXT)
+RETURNS BOOLEAN AS $$
+    WITH updated AS (
+        UPDATE users SET password_hash = p_new_hash
+        WHERE id = p_uid AND password_hash = p_old_hash
+        RETURNING id
+    )
+    SELECT EXISTS (SELECT 1 FROM updated);
+$$ LANGUAGE sql;
+
+-- Insert a summary and its 'summarize' activity row in one call; returns the summary
+CREATE OR REPLACE FUNCTION insert_summary_with_activity(p_summary JSONB, p_activity JSONB DEFAULT '{}'::JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    new_row summaries;
+BEGIN
+    INSERT INTO summaries (user_id, paper_title, paper_authors, paper_url, arxiv_id, summary_data,
+                           model_used, processing_time_seconds, word_count, cache_key)
+    SELECT r.user_id, r.paper_title, r.paper_authors, r.paper_url, r.arxiv_id, r.summary_data,
+           COALESCE(r.model_used, 'LED'), r.processing_time_seconds, r.word_count, r.cache_key
+    FROM jsonb_populate_record(NULL::summaries, p_summary) r
+    RETURNING * INTO new_row;
+
+    INSERT INTO user_activity (user_id, activity_type, activity_data)
+    VALUES (new_row.user_id, 'summarize',
+            jsonb_build_object('summary_id', new_row.id, 'paper_title', new_row.paper_title)
+                || COALESCE(p_activity, '{}'::JSONB));
+
+    RETURN to_jsonb(new_row);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Summaries per month (YYYY-MM) for one user since a cutoff, for the dashboard
+CREATE OR REPLACE FUNCTION monthly_summary_counts(p_user UUID, p_since TIMESTAMPTZ)
+RETURNS TABLE(month TEXT, cnt INT) AS $$
+    SELECT to_char(date_trunc('month', created_at), 'YYYY-MM'), COUNT(*)::INT
+    FROM summaries
+    WHERE user_id = p_user AND created_at >= p_since
+    GROUP BY 1
+    ORDER BY 1;
+$$ LANGUAGE sql STABLE;
+
+-- Create a user unless the email is taken; returns no rows on conflict
+CREATE OR REPLACE FUNCTION signup_user(p_email TEXT, p_password_hash TEXT, p_full_name TEXT DEFAULT NULL)
+RETURNS SETOF users AS $$
+    INSERT INTO users (email, password_hash, full_name, is_active)
+    VALUES (p_email, p_password_hash, p_full_name, TRUE)
+    ON CONFLICT (email) DO NOTHING
+    RETURNING *;
+$$ LANGUAGE sql;
+
 -- Row Level Security (RLS) Policies
 ALTER TABLE summaries ENABLE ROW LEVEL SECURITY;
 ALTER TABLE user_activity ENABLE ROW LEVEL SECURITY;
@@ -116,3 +192,22 @@ SELECT
 FROM users u
 LEFT JOIN summaries s ON u.id = s.user_id
 GROUP BY u.id, u.email;
+
+-- Profile and statistics for /api/auth/me in one call
+CREATE OR REPLACE FUNCTION me_bundle(p_uid UUID)
+RETURNS JSON AS $$
+    SELECT json_build_object(
+        'user', json_build_object(
+            'id', u.id,
+            'email', u.email,
+            'full_name', u.full_name,
+            'bio', u.bio,
+            'avatar_url', u.avatar_url,
+            'created_at', u.created_at,
+            'last_login', u.last_login
+        ),
+        'stats', (SELECT row_to_json(st) FROM user_summary_stats st WHERE st.user_id = u.id)
+    )
+    FROM users u
+    WHERE u.id = p_uid;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,34 @@
+"""
+ETag / Cache-Control handling for read-only JSON routes
+"""
+import hashlib
+from functools import wraps
+from flask import request, make_response
+
+
+def cached_json():
+    """Tag 200 responses with a content ETag and answer If-None-Match with 304.
+    
+    Responses are per user and change on any write (a delete, a profile
+    update), so they are private, vary on Authorization and marked no-cache:
+    the browser revalidates every load and gets a cheap 304 while the
+    content is unchanged. When flask-compress
+    encodes the body it suffixes the ETag (abc -> abc:br) and evaluates the
+    conditional again itself, so both encoded and plain clients get 304s.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            
+            response.set_etag(hashlib.blake2b(response.get_data(), digest_size=16).hexdigest())
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            response.vary.add('Authorization')
+            return response.make_conditional(request)
+        
+        return decorated
+    
+    return decorator
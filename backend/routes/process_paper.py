@@ -3,31 +3,341 @@ Paper processing routes - integrates main.py summarization with database
 """
 from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
-from supabase import create_client
-from database.config import SUPABASE_URL, SUPABASE_SERVICE_KEY
+from auth._client import get_supabase
 from auth.utils import token_required
-from datetime import datetime
+from cachetools import TTLCache
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-import sys
+from requests.adapters import HTTPAdapter
+import arxiv
+import hashlib
+import re
+import requests
+import threading
 import time
 import tempfile
-
-# Add parent directory to path to import main.py
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-from main import EnhancedResearchPaperSummarizer
+import traceback
+import uuid
+from summarizer import get_summarizer, gpu_semaphore
+from semantic_cache import SemanticCache
 
 process_bp = Blueprint('process', __name__)
-supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+supabase = get_supabase()
+semantic_cache = SemanticCache(supabase)
+
+ALLOWED_EXT_SUFFIXES = ('.pdf',)
+# New-style arXiv id (optionally versioned), bare or inside a URL
+ARXIV_ID_RE = re.compile(r'(\d{4}\.\d{4,5}(v\d+)?)')
+
+# Shared so PDF downloads reuse keep-alive connections to arXiv
+_http = requests.Session()
+_http.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=20))
+_http.mount('http://', HTTPAdapter(pool_connections=10, pool_maxsize=20))
+
+# Processing jobs run off the request threads; the model stage is still
+# serialized by gpu_semaphore, so two workers overlap one paper's download
+# and parsing with another's summarization
+_job_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='process-job')
+# job_id -> state; expiring so jobs nobody polls don't accumulate
+_jobs = TTLCache(maxsize=1024, ttl=3600)
+_jobs_lock = threading.Lock()
+# Papers being summarized right now, by cache key; see _single_flight
+_inflight: dict[str, Future] = {}
+_inflight_lock = threading.Lock()
 
-ALLOWED_EXTENSIONS = {'pdf'}
+# Columns copied from a previous row when the same paper is processed again
+CACHED_COLUMNS = 'paper_title, paper_authors, paper_url, arxiv_id, summary_data, model_used, word_count'
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return filename.lower().endswith(ALLOWED_EXT_SUFFIXES)
+
+def save_upload(stream):
+    """Copy an upload stream to a new temp PDF in 1 MiB chunks, hashing as it goes.
+    
+    Returns (path, blake2b hex digest). The file is kept (delete=False) since
+    a background job reads it after the request returns, and Windows can't
+    reopen a NamedTemporaryFile by name while it's held open; the job unlinks
+    it. A failed copy removes the partial file before re-raising.
+    """
+    h = hashlib.blake2b(digest_size=32)
+    with tempfile.NamedTemporaryFile(prefix='papermind_', suffix='.pdf', delete=False) as tmp:
+        try:
+            while chunk := stream.read(1 << 20):
+                h.update(chunk)
+                tmp.write(chunk)
+        except BaseException:
+            tmp.close()
+            Path(tmp.name).unlink(missing_ok=True)
+            raise
+    return Path(tmp.name), h.hexdigest()
+
+def find_cached_summary(cache_key):
+    """Latest summary row (any user) for the same paper, or None.
+    
+    cache_key is the PDF's content digest for uploads and arxiv:<id>v<n>
+    for arXiv papers.
+    """
+    result = supabase.table('summaries').select(CACHED_COLUMNS).eq('cache_key', cache_key) \
+        .order('created_at', desc=True).limit(1).execute()
+    return result.data[0] if result.data else None
+
+def find_similar_summary(abstract):
+    """Summary row of a near-duplicate paper by abstract embedding, or None.
+    
+    Best effort: a failing lookup just means the paper is summarized.
+    """
+    try:
+        summary_id = semantic_cache.lookup(abstract)
+        if not summary_id:
+            return None
+        result = supabase.table('summaries').select(CACHED_COLUMNS).eq('id', summary_id).limit(1).execute()
+        return result.data[0] if result.data else None
+    except Exception as e:
+        print(f"⚠️ Semantic cache lookup failed: {e}")
+        return None
+
+def remember_abstract(summary_id, abstract):
+    """Index a new summary's abstract for later near-duplicate lookups"""
+    try:
+        semantic_cache.add(summary_id, abstract)
+    except Exception as e:
+        print(f"⚠️ Semantic cache update failed: {e}")
+
+def _set_job(job_id, **fields):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            job.update(fields)
+
+def _submit_job(user_id, work, *args):
+    """Queue work(*args) -> result dict; returns the job id"""
+    job_id = uuid.uuid4().hex
+    with _jobs_lock:
+        _jobs[job_id] = {'user_id': user_id, 'status': 'queued', 'result': None, 'error': None}
+    
+    def run():
+        _set_job(job_id, status='processing')
+        try:
+            _set_job(job_id, status='completed', result=work(*args))
+        except Exception as e:
+            traceback.print_exc()
+            _set_job(job_id, status='error', error=str(e))
+    
+    _job_executor.submit(run)
+    return job_id
+
+def _accepted(job_id):
+    return jsonify({
+        'message': 'Paper queued for processing',
+        'job_id': job_id,
+        'status_url': f'/api/process/status/{job_id}'
+    }), 202
+
+def _save_summary(summary_data, activity_data):
+    """Store a summary and its activity row; returns the new summary row"""
+    # Save the summary and log the activity in one transaction
+    result = supabase.rpc('insert_summary_with_activity', {
+        'p_summary': summary_data,
+        'p_activity': activity_data
+    }).execute()
+    
+    if not result.data:
+        raise RuntimeError('Failed to save summary')
+    return result.data
+
+def _single_flight(key, compute):
+    """Run compute() once per key across concurrent jobs.
+    
+    Returns (result, leader); jobs that arrive while another is computing the
+    same key wait and share its result instead of summarizing it again.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        return future.result(), False
+    
+    try:
+        result = compute()
+        future.set_result(result)
+        return result, True
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+def _summarize_upload(temp_path, filename):
+    """Summary columns for an uploaded PDF, and its abstract (None if an existing summary was reused)"""
+    # Not this exact PDF; try a near-duplicate by its abstract
+    summarizer = get_summarizer()
+    sections = summarizer.extract_sections(str(temp_path))
+    abstract = sections.get('abstract', '')
+    similar = find_similar_summary(abstract)
+    if similar:
+        return similar, None
+    
+    # Process the paper
+    with gpu_semaphore:
+        summary_result = summarizer.summarize_sections(sections)
+    
+    return {
+        'paper_title': summary_result.get('title', filename),
+        'paper_authors': summary_result.get('authors', []),
+        'paper_url': summary_result.get('pdf_url'),
+        'arxiv_id': summary_result.get('arxiv_id'),
+        'summary_data': {
+            'overall_summary': summary_result.get('overall_summary', ''),
+            'section_summaries': summary_result.get('section_summaries', {}),
+            'section_keywords': summary_result.get('section_keywords', {}),
+            'overall_keywords': summary_result.get('overall_keywords', []),
+            'entities': summary_result.get('entities', {}),
+            'methodology_flowchart': summary_result.get('methodology_flowchart'),
+            'sections_found': summary_result.get('sections_found', []),
+            'abstract_original': summary_result.get('abstract_original', '')
+        },
+        'model_used': 'LED-base-16384',
+        'word_count': summary_result.get('num_words_summary', 0)
+    }, abstract
+
+def _summarize_arxiv(paper, arxiv_id):
+    """Summary columns for an arXiv paper"""
+    # Download PDF, streamed to disk in 1 MiB chunks; closed before parsing
+    # so Windows lets the summarizer open it by name
+    with tempfile.NamedTemporaryFile(prefix='papermind_', suffix='.pdf', delete=False) as tmp:
+        temp_path = Path(tmp.name)
+        try:
+            with _http.get(paper.pdf_url, timeout=60, stream=True) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=1 << 20):
+                    tmp.write(chunk)
+        except BaseException:
+            tmp.close()
+            temp_path.unlink(missing_ok=True)
+            raise
+    
+    # Parse outside the GPU lock so it overlaps another job's model stage
+    summarizer = get_summarizer()
+    try:
+        sections = summarizer.extract_sections(str(temp_path))
+    finally:
+        # Clean up temp file; the sections are all that's needed from here
+        temp_path.unlink(missing_ok=True)
+    
+    # Process the paper
+    with gpu_semaphore:
+        summary_result = summarizer.summarize_sections(sections)
+    
+    return {
+        'paper_title': paper.title,
+        'paper_authors': [author.name for author in paper.authors],
+        'paper_url': paper.pdf_url,
+        'arxiv_id': arxiv_id,
+        'summary_data': {
+            'overall_summary': summary_result.get('overall_summary', ''),
+            'section_summaries': summary_result.get('section_summaries', {}),
+            'section_keywords': summary_result.get('section_keywords', {}),
+            'overall_keywords': summary_result.get('overall_keywords', []),
+            'entities': summary_result.get('entities', {}),
+            'methodology_flowchart': summary_result.get('methodology_flowchart'),
+            'sections_found': summary_result.get('sections_found', []),
+            'abstract_original': paper.summary
+        },
+        'model_used': 'LED-base-16384',
+        'word_count': summary_result.get('num_words_summary', 0)
+    }
+
+def _process_upload(user_id, temp_path, filename, cache_key):
+    """Job body for /process/upload"""
+    try:
+        start_time = time.time()
+        columns = find_cached_summary(cache_key)
+        abstract = None
+        
+        if not columns:
+            (columns, abstract), leader = _single_flight(
+                cache_key, lambda: _summarize_upload(temp_path, filename)
+            )
+            if not leader:
+                abstract = None  # indexed by the job that summarized it
+        
+        processing_time = time.time() - start_time
+        summary = _save_summary({
+            **columns,
+            'user_id': user_id,
+            'cache_key': cache_key,
+            'processing_time_seconds': round(processing_time, 2)
+        }, {
+            'processing_time': processing_time,
+            'cache_hit': abstract is None
+        })
+        if abstract:
+            remember_abstract(summary['id'], abstract)
+        
+        return {
+            'message': 'Paper processed successfully',
+            'summary_id': summary['id'],
+            'summary': summary,
+            'processing_time': processing_time
+        }
+        
+    finally:
+        # Clean up temp file
+        if temp_path.exists():
+            temp_path.unlink()
+
+def _process_arxiv(user_id, arxiv_id, versioned):
+    """Job body for /process/arxiv"""
+    # An explicit version identifies the exact PDF, so a previous summary
+    # can be reused without even asking arXiv
+    start_time = time.time()
+    cache_key = f"arxiv:{arxiv_id}" if versioned else None
+    columns = find_cached_summary(cache_key) if cache_key else None
+    fresh = False
+    
+    if not columns:
+        # Fetch paper from arXiv
+        search = arxiv.Search(id_list=[arxiv_id])
+        paper = next(search.results(), None)
+        
+        if not paper:
+            raise LookupError('Paper not found on arXiv')
+        
+        # Unversioned requests resolve to the current version
+        cache_key = f"arxiv:{paper.get_short_id()}"
+        columns = find_cached_summary(cache_key) or find_similar_summary(paper.summary)
+        
+        if not columns:
+            columns, fresh = _single_flight(cache_key, lambda: _summarize_arxiv(paper, arxiv_id))
+    
+    processing_time = time.time() - start_time
+    summary = _save_summary({
+        **columns,
+        'user_id': user_id,
+        'cache_key': cache_key,
+        'processing_time_seconds': round(processing_time, 2)
+    }, {
+        'arxiv_id': arxiv_id,
+        'processing_time': processing_time,
+        'cache_hit': not fresh
+    })
+    if fresh:
+        remember_abstract(summary['id'], paper.summary)
+    
+    return {
+        'message': 'Paper processed successfully',
+        'summary_id': summary['id'],
+        'summary': summary,
+        'processing_time': processing_time
+    }
 
 @process_bp.route('/process/upload', methods=['POST'])
 @token_required
 def upload_and_process():
-    """Upload PDF and process it through the summarizer"""
+    """Upload a PDF and queue it for summarization; poll /process/status/<job_id>"""
     try:
         # Check if file is in request
         if 'file' not in request.files:
@@ -41,81 +351,21 @@ def upload_and_process():
         if not allowed_file(file.filename):
             return jsonify({'error': 'Only PDF files are allowed'}), 400
         
-        # Save file to temporary location
+        # Save file to a fresh temp file, hashed while writing so the PDF isn't
+        # read back just to key the cache; the job removes it when done
         filename = secure_filename(file.filename)
-        temp_dir = Path(tempfile.gettempdir())
-        temp_path = temp_dir / filename
-        file.save(str(temp_path))
+        temp_path, cache_key = save_upload(file.stream)
         
-        try:
-            # Process the paper
-            start_time = time.time()
-            summarizer = EnhancedResearchPaperSummarizer()
-            summary_result = summarizer.summarize_paper(str(temp_path))
-            processing_time = time.time() - start_time
-            
-            # Prepare summary data for database
-            summary_data = {
-                'user_id': request.user_id,
-                'paper_title': summary_result.get('title', filename),
-                'paper_authors': summary_result.get('authors', []),
-                'paper_url': summary_result.get('pdf_url'),
-                'arxiv_id': summary_result.get('arxiv_id'),
-                'summary_data': {
-                    'overall_summary': summary_result.get('overall_summary', ''),
-                    'section_summaries': summary_result.get('section_summaries', {}),
-                    'section_keywords': summary_result.get('section_keywords', {}),
-                    'overall_keywords': summary_result.get('overall_keywords', []),
-                    'entities': summary_result.get('entities', {}),
-                    'methodology_flowchart': summary_result.get('methodology_flowchart'),
-                    'sections_found': summary_result.get('sections_found', []),
-                    'abstract_original': summary_result.get('abstract_original', '')
-                },
-                'model_used': 'LED-base-16384',
-                'processing_time_seconds': round(processing_time, 2),
-                'word_count': summary_result.get('num_words_summary', 0),
-                'created_at': datetime.utcnow().isoformat()
-            }
-            
-            # Save to database
-            result = supabase.table('summaries').insert(summary_data).execute()
-            
-            if not result.data:
-                return jsonify({'error': 'Failed to save summary'}), 500
-            
-            # Log activity
-            supabase.table('user_activity').insert({
-                'user_id': request.user_id,
-                'activity_type': 'summarize',
-                'activity_data': {
-                    'summary_id': result.data[0]['id'], 
-                    'paper_title': summary_data['paper_title'],
-                    'processing_time': processing_time
-                },
-                'created_at': datetime.utcnow().isoformat()
-            }).execute()
-            
-            return jsonify({
-                'message': 'Paper processed successfully',
-                'summary_id': result.data[0]['id'],
-                'summary': result.data[0],
-                'processing_time': processing_time
-            }), 201
-            
-        finally:
-            # Clean up temp file
-            if temp_path.exists():
-                temp_path.unlink()
+        return _accepted(_submit_job(request.user_id, _process_upload, request.user_id, temp_path, filename, cache_key))
         
     except Exception as e:
-        import traceback
         traceback.print_exc()
         return jsonify({'error': f'Failed to process paper: {str(e)}'}), 500
 
 @process_bp.route('/process/arxiv', methods=['POST'])
 @token_required
 def process_from_arxiv():
-    """Process paper directly from arXiv ID or URL"""
+    """Queue an arXiv paper (ID or URL) for summarization; poll /process/status/<job_id>"""
     try:
         data = request.get_json()
         arxiv_input = data.get('arxiv_id', '').strip()
@@ -124,92 +374,29 @@ def process_from_arxiv():
             return jsonify({'error': 'arXiv ID or URL required'}), 400
         
         # Extract arxiv ID from URL if needed
-        import re
-        match = re.search(r'(\d{4}\.\d{4,5}(v\d+)?)', arxiv_input)
+        match = ARXIV_ID_RE.search(arxiv_input)
         if match:
             arxiv_id = match.group(1)
         else:
             return jsonify({'error': 'Invalid arXiv ID format'}), 400
         
-        # Fetch paper from arXiv
-        import arxiv
-        search = arxiv.Search(id_list=[arxiv_id])
-        paper = next(search.results(), None)
-        
-        if not paper:
-            return jsonify({'error': 'Paper not found on arXiv'}), 404
-        
-        # Download PDF
-        import requests
-        temp_dir = Path(tempfile.gettempdir())
-        temp_path = temp_dir / f"{arxiv_id}.pdf"
-        
-        response = requests.get(paper.pdf_url, timeout=60)
-        response.raise_for_status()
-        temp_path.write_bytes(response.content)
-        
-        try:
-            # Process the paper
-            start_time = time.time()
-            summarizer = EnhancedResearchPaperSummarizer()
-            summary_result = summarizer.summarize_paper(str(temp_path))
-            processing_time = time.time() - start_time
-            
-            # Prepare summary data
-            summary_data = {
-                'user_id': request.user_id,
-                'paper_title': paper.title,
-                'paper_authors': [author.name for author in paper.authors],
-                'paper_url': paper.pdf_url,
-                'arxiv_id': arxiv_id,
-                'summary_data': {
-                    'overall_summary': summary_result.get('overall_summary', ''),
-                    'section_summaries': summary_result.get('section_summaries', {}),
-                    'section_keywords': summary_result.get('section_keywords', {}),
-                    'overall_keywords': summary_result.get('overall_keywords', []),
-                    'entities': summary_result.get('entities', {}),
-                    'methodology_flowchart': summary_result.get('methodology_flowchart'),
-                    'sections_found': summary_result.get('sections_found', []),
-                    'abstract_original': paper.summary
-                },
-                'model_used': 'LED-base-16384',
-                'processing_time_seconds': round(processing_time, 2),
-                'word_count': summary_result.get('num_words_summary', 0),
-                'created_at': datetime.utcnow().isoformat()
-            }
-            
-            # Save to database
-            result = supabase.table('summaries').insert(summary_data).execute()
-            
-            if not result.data:
-                return jsonify({'error': 'Failed to save summary'}), 500
-            
-            # Log activity
-            supabase.table('user_activity').insert({
-                'user_id': request.user_id,
-                'activity_type': 'summarize',
-                'activity_data': {
-                    'summary_id': result.data[0]['id'],
-                    'paper_title': summary_data['paper_title'],
-                    'arxiv_id': arxiv_id,
-                    'processing_time': processing_time
-                },
-                'created_at': datetime.utcnow().isoformat()
-            }).execute()
-            
-            return jsonify({
-                'message': 'Paper processed successfully',
-                'summary_id': result.data[0]['id'],
-                'summary': result.data[0],
-                'processing_time': processing_time
-            }), 201
-            
-        finally:
-            # Clean up temp file
-            if temp_path.exists():
-                temp_path.unlink()
+        return _accepted(_submit_job(request.user_id, _process_arxiv, request.user_id, arxiv_id, bool(match.group(2))))
         
     except Exception as e:
-        import traceback
         traceback.print_exc()
         return jsonify({'error': f'Failed to process arXiv paper: {str(e)}'}), 500
+
+@process_bp.route('/process/status/<job_id>', methods=['GET'])
+@token_required
+def get_process_status(job_id):
+    """Status of a processing job; includes the saved summary once completed"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        # Other users' jobs look the same as unknown ones
+        if job is None or job['user_id'] != request.user_id:
+            return jsonify({'error': 'Job not found'}), 404
+        job = dict(job)
+    
+    job.pop('user_id')
+    job['job_id'] = job_id
+    return jsonify(job), 200
@@ -3,24 +3,49 @@ Profile and avatar management routes
 """
 from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
-from supabase import create_client
-from database.config import SUPABASE_URL, SUPABASE_SERVICE_KEY
+from database.config import SUPABASE_URL
+from auth._client import get_supabase
+from auth._me_cache import invalidate_me_user
 from auth.utils import token_required
-from datetime import datetime
+from routes._http_cache import cached_json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import atexit
 import uuid
 
 profile_bp = Blueprint('profile', __name__)
-supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+supabase = get_supabase()
 
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+ALLOWED_EXTENSIONS = frozenset({'png', 'jpg', 'jpeg', 'gif', 'webp'})
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+# Multipart headers and boundaries on top of the file itself
+MAX_AVATAR_REQUEST_SIZE = MAX_FILE_SIZE + 64 * 1024
+AVATAR_URL_PREFIX = f"{SUPABASE_URL.rstrip('/')}/storage/v1/object/public/avatars/"
 
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+# Storage cleanup the response doesn't wait on
+_BG = ThreadPoolExecutor(max_workers=2, thread_name_prefix='profile-bg')
+atexit.register(lambda: _BG.shutdown(wait=False))
+
+def file_extension(filename):
+    """Lowercased extension without the dot, or '' if there is none"""
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+def allowed_file(ext):
+    return ext in ALLOWED_EXTENSIONS
+
+def public_avatar_url(path):
+    """Public URL of an object in the avatars bucket, built without the SDK"""
+    return AVATAR_URL_PREFIX + path
+
+def _remove_avatar_object(path):
+    try:
+        supabase.storage.from_('avatars').remove([path])
+    except Exception as e:
+        print(f"⚠️ Failed to remove avatar {path}: {type(e).__name__}: {e}")
 
 @profile_bp.route('/profile', methods=['GET'])
 @token_required
+@cached_json()
 def get_profile():
     """Get user profile"""
     try:
@@ -50,13 +75,13 @@ def update_profile():
         if not update_data:
             return jsonify({'error': 'No data to update'}), 400
         
-        update_data['updated_at'] = datetime.utcnow().isoformat()
-        
         result = supabase.table('users').update(update_data).eq('id', request.user_id).execute()
         
         if not result.data:
             return jsonify({'error': 'Failed to update profile'}), 500
         
+        invalidate_me_user(request.user_id)
+        
         return jsonify({
             'message': 'Profile updated successfully',
             'profile': result.data[0]
@@ -70,6 +95,10 @@ def update_profile():
 def upload_avatar():
     """Upload user avatar to Supabase Storage"""
     try:
+        # Reject before request.files spools the whole body
+        if request.content_length is not None and request.content_length > MAX_AVATAR_REQUEST_SIZE:
+            return jsonify({'error': 'File too large. Maximum size is 5MB'}), 400
+        
         if 'avatar' not in request.files:
             return jsonify({'error': 'No file provided'}), 400
         
@@ -78,18 +107,18 @@ def upload_avatar():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        if not allowed_file(file.filename):
+        ext = file_extension(file.filename)
+        if not allowed_file(ext):
             return jsonify({'error': 'Invalid file type. Allowed: PNG, JPG, JPEG, GIF, WEBP'}), 400
         
-        # Read file content
-        file_content = file.read()
+        # Read file content, never more than one byte past the limit
+        file_content = file.stream.read(MAX_FILE_SIZE + 1)
         
         if len(file_content) > MAX_FILE_SIZE:
             return jsonify({'error': 'File too large. Maximum size is 5MB'}), 400
         
         # Generate unique filename
-        ext = file.filename.rsplit('.', 1)[1].lower()
-        filename = f"{request.user_id}/{uuid.uuid4()}.{ext}"
+        filename = f"{request.user_id}/{uuid.uuid4().hex}.{ext}"
         
         # Upload to Supabase Storage
         # Note: You need to create an 'avatars' bucket in Supabase Storage first
@@ -104,13 +133,13 @@ def upload_avatar():
             )
             
             # Get public URL
-            public_url = supabase.storage.from_('avatars').get_public_url(filename)
+            public_url = public_avatar_url(filename)
             
             # Update user profile with avatar URL
             supabase.table('users').update({
-                'avatar_url': public_url,
-                'updated_at': datetime.utcnow().isoformat()
+                'avatar_url': public_url
             }).eq('id', request.user_id).execute()
+            invalidate_me_user(request.user_id)
             
             return jsonify({
                 'message': 'Avatar uploaded successfully',
@@ -123,6 +152,81 @@ def upload_avatar():
     except Exception as e:
         return jsonify({'error': f'Failed to upload avatar: {str(e)}'}), 500
 
+@profile_bp.route('/profile/avatar/presign', methods=['POST'])
+@token_required
+def presign_avatar_upload():
+    """Signed Storage URL the client uploads its avatar to directly.
+    
+    The file never passes through the API; follow up with
+    POST /profile/avatar/confirm once the upload has finished.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        ext = file_extension(data.get('filename', ''))
+        
+        if not allowed_file(ext):
+            return jsonify({'error': 'Invalid file type. Allowed: PNG, JPG, JPEG, GIF, WEBP'}), 400
+        
+        size = data.get('size') or 0
+        # bool is an int subclass; true/false aren't sizes
+        if not isinstance(size, int) or isinstance(size, bool) or size < 0:
+            return jsonify({'error': 'size must be a non-negative integer number of bytes'}), 400
+        
+        if size > MAX_FILE_SIZE:
+            return jsonify({'error': 'File too large. Maximum size is 5MB'}), 400
+        
+        path = f"{request.user_id}/{uuid.uuid4().hex}.{ext}"
+        signed = supabase.storage.from_('avatars').create_signed_upload_url(path)
+        
+        return jsonify({
+            'upload_url': signed['signed_url'],
+            'token': signed['token'],
+            'path': path
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to prepare avatar upload: {str(e)}'}), 500
+
+@profile_bp.route('/profile/avatar/confirm', methods=['POST'])
+@token_required
+def confirm_avatar_upload():
+    """Point the profile at an avatar uploaded through a presigned URL"""
+    try:
+        data = request.get_json(silent=True) or {}
+        path = data.get('path', '')
+        folder, _, name = path.partition('/')
+        
+        # Only objects in the caller's own folder, as handed out by presign
+        if folder != request.user_id or not name or '/' in name or not allowed_file(file_extension(name)):
+            return jsonify({'error': 'Invalid avatar path'}), 400
+        
+        bucket = supabase.storage.from_('avatars')
+        listed = bucket.list(folder, {'search': name})
+        stored = next((obj for obj in listed if obj.get('name') == name), None)
+        
+        if stored is None:
+            return jsonify({'error': 'Avatar upload not found'}), 404
+        
+        # The signed URL doesn't enforce our size limit, so check what arrived
+        if ((stored.get('metadata') or {}).get('size') or 0) > MAX_FILE_SIZE:
+            bucket.remove([path])
+            return jsonify({'error': 'File too large. Maximum size is 5MB'}), 400
+        
+        public_url = public_avatar_url(path)
+        
+        supabase.table('users').update({
+            'avatar_url': public_url
+        }).eq('id', request.user_id).execute()
+        invalidate_me_user(request.user_id)
+        
+        return jsonify({
+            'message': 'Avatar uploaded successfully',
+            'avatar_url': public_url
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to confirm avatar upload: {str(e)}'}), 500
+
 @profile_bp.route('/profile/avatar', methods=['DELETE'])
 @token_required
 def delete_avatar():
@@ -138,20 +242,16 @@ def delete_avatar():
         
         # Extract filename from URL
         # URL format: https://{project}.supabase.co/storage/v1/object/public/avatars/{filename}
+        # Storage removal runs alongside the profile update; a failure there
+        # only leaves an orphaned object, so it doesn't fail the request
         if '/avatars/' in avatar_url:
-            filename = avatar_url.split('/avatars/')[1]
-            
-            # Delete from storage
-            try:
-                supabase.storage.from_('avatars').remove([filename])
-            except:
-                pass  # Continue even if storage deletion fails
+            _BG.submit(_remove_avatar_object, avatar_url.split('/avatars/')[1])
         
         # Update user profile
         supabase.table('users').update({
-            'avatar_url': None,
-            'updated_at': datetime.utcnow().isoformat()
+            'avatar_url': None
         }).eq('id', request.user_id).execute()
+        invalidate_me_user(request.user_id)
         
         return jsonify({'message': 'Avatar deleted successfully'}), 200
         
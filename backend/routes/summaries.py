@@ -2,57 +2,139 @@
 User-specific summary routes with authentication
 """
 from flask import Blueprint, request, jsonify
-from supabase import create_client
-from database.config import SUPABASE_URL, SUPABASE_SERVICE_KEY
+from auth._client import get_supabase
 from auth.utils import token_required
-from datetime import datetime
+from routes._http_cache import cached_json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import base64
+import json
+import re
+import uuid
 
 summaries_bp = Blueprint('summaries', __name__)
-supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+supabase = get_supabase()
+
+# Runs the dashboard's independent queries side by side
+_query_pool = ThreadPoolExecutor(max_workers=6, thread_name_prefix='dashboard-query')
+
+def encode_cursor(row):
+    """Opaque ?after= cursor pointing just past row"""
+    raw = json.dumps({'created_at': row['created_at'], 'id': row['id']}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def _parse_timestamp(value):
+    """datetime from a Postgres timestamptz string
+    
+    fromisoformat before Python 3.11 takes neither a Z suffix nor fewer
+    than 6 fractional digits, both of which Postgres may send.
+    """
+    value = re.sub(r'\.(\d{1,6})\d*', lambda m: '.' + m.group(1).ljust(6, '0'), value.replace('Z', '+00:00'))
+    return datetime.fromisoformat(value)
+
+def decode_cursor(cursor):
+    """(created_at, id) from an ?after= cursor; ValueError if it's malformed
+    
+    Both values end up inside a PostgREST filter, so they are parsed and
+    re-serialized rather than passed through as the client sent them.
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return _parse_timestamp(data['created_at']).isoformat(), str(uuid.UUID(data['id']))
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        raise ValueError('Invalid cursor') from e
 
 @summaries_bp.route('/summaries', methods=['GET'])
 @token_required
+@cached_json()
 def get_user_summaries():
-    """Get all summaries for the authenticated user"""
+    """Get all summaries for the authenticated user
+    
+    Paged by cursor: pass the previous response's next_cursor as ?after=.
+    ?page= still selects numbered pages (with totals) but costs an OFFSET
+    scan that grows with the page number.
+    """
     try:
         # Query parameters for filtering and pagination
-        page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 10))
         sort_by = request.args.get('sort_by', 'created_at')
         order = request.args.get('order', 'desc')
         search = request.args.get('search', '')
+        after = request.args.get('after')
+        
+        if 'page' in request.args and after is None:
+            return _legacy_page(int(request.args['page']), per_page, sort_by, order, search)
         
-        # Calculate offset
-        offset = (page - 1) * per_page
+        if sort_by != 'created_at':
+            return jsonify({'error': 'Cursor pagination only supports sort_by=created_at'}), 400
         
-        # Build query
-        query = supabase.table('summaries').select('*', count='exact').eq('user_id', request.user_id)
+        desc = order == 'desc'
+        query = supabase.table('summaries').select('*').eq('user_id', request.user_id)
         
         # Add search if provided
         if search:
             query = query.or_(f'paper_title.ilike.%{search}%,arxiv_id.ilike.%{search}%')
         
-        # Add sorting
-        query = query.order(sort_by, desc=(order == 'desc'))
+        # Rows strictly after the cursor in (created_at, id) order; walks
+        # idx_summaries_user_created_at instead of skipping rows
+        if after:
+            try:
+                cursor_ts, cursor_id = decode_cursor(after)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            op = 'lt' if desc else 'gt'
+            query = query.or_(f'created_at.{op}."{cursor_ts}",'
+                              f'and(created_at.eq."{cursor_ts}",id.{op}.{cursor_id})')
         
-        # Add pagination
-        query = query.range(offset, offset + per_page - 1)
+        # One extra row tells us whether there's a next page without a count
+        query = query.order('created_at', desc=desc).order('id', desc=desc).limit(per_page + 1)
+        rows = query.execute().data or []
         
-        result = query.execute()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
         
         return jsonify({
-            'summaries': result.data,
-            'total': result.count,
-            'page': page,
+            'summaries': rows,
             'per_page': per_page,
-            'total_pages': (result.count + per_page - 1) // per_page
+            'next_cursor': encode_cursor(rows[-1]) if has_more else None
         }), 200
         
     except Exception as e:
         return jsonify({'error': f'Failed to fetch summaries: {str(e)}'}), 500
 
+def _legacy_page(page, per_page, sort_by, order, search):
+    """Numbered-page listing for clients not yet on cursors"""
+    # Calculate offset
+    offset = (page - 1) * per_page
+    
+    # Build query
+    query = supabase.table('summaries').select('*', count='exact').eq('user_id', request.user_id)
+    
+    # Add search if provided
+    if search:
+        query = query.or_(f'paper_title.ilike.%{search}%,arxiv_id.ilike.%{search}%')
+    
+    # Add sorting
+    query = query.order(sort_by, desc=(order == 'desc'))
+    
+    # Add pagination
+    query = query.range(offset, offset + per_page - 1)
+    
+    result = query.execute()
+    
+    response = jsonify({
+        'summaries': result.data,
+        'total': result.count,
+        'page': page,
+        'per_page': per_page,
+        'total_pages': (result.count + per_page - 1) // per_page
+    })
+    response.headers['Deprecation'] = 'true'
+    return response, 200
+
 @summaries_bp.route('/summaries/<summary_id>', methods=['GET'])
 @token_required
+@cached_json()
 def get_summary(summary_id):
     """Get a specific summary by ID"""
     try:
@@ -82,26 +164,18 @@ def create_summary():
             'summary_data': data.get('summary_data', {}),
             'model_used': data.get('model_used', 'LED'),
             'processing_time_seconds': data.get('processing_time_seconds'),
-            'word_count': data.get('word_count'),
-            'created_at': datetime.utcnow().isoformat()
+            'word_count': data.get('word_count')
         }
         
-        result = supabase.table('summaries').insert(summary_data).execute()
+        # Save the summary and log the activity in one transaction
+        result = supabase.rpc('insert_summary_with_activity', {'p_summary': summary_data}).execute()
         
         if not result.data:
             return jsonify({'error': 'Failed to save summary'}), 500
         
-        # Log activity
-        supabase.table('user_activity').insert({
-            'user_id': request.user_id,
-            'activity_type': 'summarize',
-            'activity_data': {'summary_id': result.data[0]['id'], 'paper_title': summary_data['paper_title']},
-            'created_at': datetime.utcnow().isoformat()
-        }).execute()
-        
         return jsonify({
             'message': 'Summary saved successfully',
-            'summary': result.data[0]
+            'summary': result.data
         }), 201
         
     except Exception as e:
@@ -127,26 +201,39 @@ def delete_summary(summary_id):
 
 @summaries_bp.route('/dashboard/stats', methods=['GET'])
 @token_required
+@cached_json()
 def get_dashboard_stats():
     """Get dashboard statistics for the authenticated user"""
     try:
-        # Get user stats from view
-        stats_result = supabase.table('user_summary_stats').select('*').eq('user_id', request.user_id).execute()
-        
-        # Get recent activity
-        activity_result = supabase.table('user_activity').select('*').eq('user_id', request.user_id).order('created_at', desc=True).limit(10).execute()
-        
-        # Get summaries by month (last 6 months)
-        from datetime import datetime, timedelta
+        user_id = request.user_id
         six_months_ago = (datetime.utcnow() - timedelta(days=180)).isoformat()
         
-        monthly_result = supabase.table('summaries').select('created_at').eq('user_id', request.user_id).gte('created_at', six_months_ago).execute()
+        # The three reads are independent, so they go out together and the
+        # route waits for the slowest rather than their sum
+        # Get user stats from view
+        stats_future = _query_pool.submit(
+            lambda: supabase.table('user_summary_stats').select('*').eq('user_id', user_id).execute()
+        )
         
-        # Process monthly data
-        monthly_counts = {}
-        for summary in monthly_result.data:
-            month_key = summary['created_at'][:7]  # YYYY-MM
-            monthly_counts[month_key] = monthly_counts.get(month_key, 0) + 1
+        # Get recent activity
+        activity_future = _query_pool.submit(
+            lambda: supabase.table('user_activity').select('*').eq('user_id', user_id)
+                .order('created_at', desc=True).limit(10).execute()
+        )
+        
+        # Get summaries by month (last 6 months), counted in Postgres: at
+        # most 7 (month, cnt) rows instead of every created_at
+        monthly_future = _query_pool.submit(
+            lambda: supabase.rpc('monthly_summary_counts', {
+                'p_user': user_id,
+                'p_since': six_months_ago
+            }).execute()
+        )
+        
+        stats_result = stats_future.result()
+        activity_result = activity_future.result()
+        monthly_result = monthly_future.result()
+        monthly_counts = {row['month']: row['cnt'] for row in monthly_result.data or []}
         
         stats = stats_result.data[0] if stats_result.data else {}
         
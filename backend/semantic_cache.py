@@ -0,0 +1,99 @@
+"""
+Near-duplicate lookup over already summarized papers.
+
+Abstracts are embedded with a small sentence encoder and kept in an
+in-process FAISS inner-product index, backed by the summary_embeddings
+table so the index survives restarts. A new paper whose abstract is close
+enough to a summarized one (another arXiv version, preprint vs.
+camera-ready) can reuse that summary instead of running the model.
+"""
+import threading
+from typing import Optional
+
+import numpy as np
+
+try:
+    import faiss
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    faiss = None
+    SentenceTransformer = None
+
+EMBED_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+SIMILARITY_THRESHOLD = 0.95
+# PostgREST caps how many rows one select returns
+_PAGE_SIZE = 1000
+
+
+class SemanticCache:
+    """FAISS index of abstract embeddings -> summary ids; a no-op without faiss/sentence-transformers."""
+
+    def __init__(self, client, threshold: float = SIMILARITY_THRESHOLD):
+        self.client = client
+        self.threshold = threshold
+        self.enabled = faiss is not None
+        self._lock = threading.Lock()
+        self._model = None
+        self._index = None
+        self._ids = []
+
+    def _ensure_loaded(self):
+        """Load the encoder and the stored embeddings on first use."""
+        if self._index is not None:
+            return
+        with self._lock:
+            if self._index is not None:
+                return
+            # CPU keeps it clear of the summarizer's GPU model swapping
+            model = SentenceTransformer(EMBED_MODEL, device='cpu')
+            index = faiss.IndexFlatIP(model.get_sentence_embedding_dimension())
+
+            ids, vectors = [], []
+            start = 0
+            while True:
+                rows = self.client.table('summary_embeddings').select('summary_id, embedding') \
+                    .range(start, start + _PAGE_SIZE - 1).execute().data or []
+                ids.extend(row['summary_id'] for row in rows)
+                vectors.extend(row['embedding'] for row in rows)
+                if len(rows) < _PAGE_SIZE:
+                    break
+                start += _PAGE_SIZE
+
+            if vectors:
+                matrix = np.asarray(vectors, dtype=np.float32)
+                faiss.normalize_L2(matrix)
+                index.add(matrix)
+            self._model, self._ids, self._index = model, ids, index
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = self._model.encode([text], convert_to_numpy=True).astype(np.float32)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def lookup(self, text: str) -> Optional[str]:
+        """Summary id of the most similar abstract, if it clears the threshold."""
+        if not self.enabled or not text:
+            return None
+        self._ensure_loaded()
+        query = self._embed(text)
+        with self._lock:
+            if self._index.ntotal == 0:
+                return None
+            scores, positions = self._index.search(query, 1)
+            if scores[0, 0] < self.threshold:
+                return None
+            return self._ids[positions[0, 0]]
+
+    def add(self, summary_id: str, text: str):
+        """Store and index the abstract embedding of a newly created summary."""
+        if not self.enabled or not text:
+            return
+        self._ensure_loaded()
+        vector = self._embed(text)
+        self.client.table('summary_embeddings').insert({
+            'summary_id': summary_id,
+            'embedding': vector[0].tolist()
+        }).execute()
+        with self._lock:
+            self._index.add(vector)
+            self._ids.append(summary_id)
@@ -1,26 +1,65 @@
 """
 Quick script to create database tables in Supabase
 """
-from supabase import create_client
-from database.config import SUPABASE_URL, SUPABASE_SERVICE_KEY
+from auth._client import get_supabase
+from database.config import SUPABASE_URL
+from concurrent.futures import ThreadPoolExecutor
 import pathlib
+import re
 
 print("🔧 Setting up database tables...")
 print(f"📡 Connecting to: {SUPABASE_URL}")
 
-client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+client = get_supabase()
 
 # Read SQL schema
 schema_path = pathlib.Path(__file__).parent / 'database' / 'schema.sql'
 sql = schema_path.read_text()
 
-print("📝 Running SQL schema...")
 
-# Split into individual statements and execute
-statements = [s.strip() for s in sql.split(';') if s.strip()]
+def split_statements(sql):
+    """Split on ';' outside comments and $$-quoted function bodies"""
+    sql = re.sub(r'--[^\n]*', '', sql)
+    statements, current, in_body = [], [], False
+    for part in re.split(r'(\$\$)', sql):
+        if part == '$$':
+            in_body = not in_body
+            current.append(part)
+            continue
+        if in_body:
+            current.append(part)
+            continue
+        *complete, rest = part.split(';')
+        for piece in complete:
+            current.append(piece)
+            statements.append(''.join(current).strip())
+            current = []
+        current.append(rest)
+    statements.append(''.join(current).strip())
+    return [s for s in statements if s]
+
+
+def check_table(name):
+    try:
+        client.table(name).select('*').limit(1).execute()
+        return f"✅ '{name}' table exists"
+    except Exception as e:
+        return f"❌ '{name}' table error: {e}"
+
+
+print("📝 Running SQL schema...")
 
-for i, statement in enumerate(statements, 1):
-    if statement:
+# The whole schema in one round trip; the RPC call is already one
+# transaction, so a failing statement rolls back the batch
+try:
+    client.rpc('exec_sql', {'query': sql}).execute()
+    print("✅ Schema executed")
+except Exception as batch_error:
+    # Rerun statement by statement to report which ones fail
+    print(f"⚠️  Schema batch failed ({str(batch_error)[:100]}), running statements one by one...")
+    statements = split_statements(sql)
+    
+    for i, statement in enumerate(statements, 1):
         try:
             # Use the REST API to execute SQL
             result = client.rpc('exec_sql', {'query': statement + ';'}).execute()
@@ -36,22 +75,8 @@ print("\n✅ Database setup complete!")
 print("🔍 Verifying tables...")
 
 # Verify tables exist
-try:
-    result = client.table('users').select('*').limit(1).execute()
-    print("✅ 'users' table exists")
-except Exception as e:
-    print(f"❌ 'users' table error: {e}")
-
-try:
-    result = client.table('summaries').select('*').limit(1).execute()
-    print("✅ 'summaries' table exists")
-except Exception as e:
-    print(f"❌ 'summaries' table error: {e}")
-
-try:
-    result = client.table('user_activity').select('*').limit(1).execute()
-    print("✅ 'user_activity' table exists")
-except Exception as e:
-    print(f"❌ 'user_activity' table error: {e}")
+with ThreadPoolExecutor(max_workers=3) as pool:
+    for message in pool.map(check_table, ['users', 'summaries', 'user_activity']):
+        print(message)
 
 print("\n🎉 Setup complete! Restart your backend and try signing up again.")
@@ -0,0 +1,33 @@
+"""
+Process-wide summarizer shared by app.py and the /api/process routes
+"""
+import sys
+import threading
+from pathlib import Path
+
+# Add parent directory to path to import main.py
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from main import EnhancedResearchPaperSummarizer
+
+_summarizer = None
+_summ_lock = threading.Lock()
+# One summarizer and one set of models for the process: they stay resident
+# (with PAPERMIND_SWAP_MODELS=1 they are swapped per section instead), so
+# only one paper may be in the model stage at a time to bound GPU memory and
+# keep a swap from unloading a model another paper is using. PDF parsing can
+# run alongside it.
+gpu_semaphore = threading.Semaphore(1)
+
+
+def get_summarizer():
+    """Get or create summarizer instance.
+    
+    Double-checked under a lock so concurrent first requests (threaded
+    server, async endpoint threads) don't each load the models.
+    """
+    global _summarizer
+    if _summarizer is None:
+        with _summ_lock:
+            if _summarizer is None:
+                _summarizer = EnhancedResearchPaperSummarizer()
+    return _summarizer
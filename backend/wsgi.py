@@ -0,0 +1,16 @@
+"""WSGI entry point for running the API under a production server.
+
+    gunicorn -w 1 --threads 8 --timeout 300 wsgi:application
+
+One worker keeps a single copy of the models in GPU memory; threads give
+concurrency for the I/O-bound endpoints and keep /api/summarize/async's
+background threads alive between requests. Don't add --preload on CUDA
+hosts: a CUDA context created in the master does not survive the fork.
+"""
+
+from app import app, get_summarizer
+
+# Load the models while the worker boots rather than on the first request
+get_summarizer()
+
+application = app
@@ -61,12 +61,27 @@ export const batchSummarize = async (papers) => {
 }
 
 // New database-saving endpoints (requires authentication)
+// Processing runs as a background job; these resolve once it has finished
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms))
+
+export const waitForProcessJob = async (jobId, token, intervalMs = 2000) => {
+  for (;;) {
+    const response = await api.get(`/process/status/${jobId}`, {
+      headers: { 'Authorization': `Bearer ${token}` },
+    })
+    const job = response.data
+    if (job.status === 'completed') return job.result
+    if (job.status === 'error') throw new Error(job.error || 'Processing failed')
+    await sleep(intervalMs)
+  }
+}
+
 export const processArxivPaper = async (arxivId, token) => {
   const response = await api.post('/process/arxiv', 
     { arxiv_id: arxivId },
     { headers: { 'Authorization': `Bearer ${token}` } }
   )
-  return response.data
+  return waitForProcessJob(response.data.job_id, token)
 }
 
 export const processUploadedPaper = async (file, token) => {
@@ -78,7 +93,7 @@ export const processUploadedPaper = async (file, token) => {
       'Authorization': `Bearer ${token}`
     },
   })
-  return response.data
+  return waitForProcessJob(response.data.job_id, token)
 }
 
 export default api
@@ -42,15 +42,43 @@ export default function AvatarUpload({ currentAvatar, onAvatarUpdate }) {
     setUploading(true);
 
     try {
-      const formData = new FormData();
-      formData.append('avatar', file);
+      const authHeaders = {
+        'Authorization': `Bearer ${token}`,
+        'Content-Type': 'application/json'
+      };
 
-      const response = await fetch('http://localhost:5000/api/profile/avatar', {
+      // Get a signed Storage URL and upload the file straight to it
+      const presignResponse = await fetch('http://localhost:5000/api/profile/avatar/presign', {
         method: 'POST',
-        headers: {
-          'Authorization': `Bearer ${token}`
-        },
-        body: formData
+        headers: authHeaders,
+        body: JSON.stringify({ filename: file.name, size: file.size })
+      });
+      const presign = await presignResponse.json();
+
+      if (!presignResponse.ok) {
+        toast.error(presign.error || 'Failed to upload avatar');
+        setPreview(currentAvatar);
+        setUploading(false);
+        return;
+      }
+
+      const uploadResponse = await fetch(presign.upload_url, {
+        method: 'PUT',
+        headers: { 'Content-Type': file.type, 'x-upsert': 'true' },
+        body: file
+      });
+
+      if (!uploadResponse.ok) {
+        toast.error('Failed to upload avatar');
+        setPreview(currentAvatar);
+        setUploading(false);
+        return;
+      }
+
+      const response = await fetch('http://localhost:5000/api/profile/avatar/confirm', {
+        method: 'POST',
+        headers: authHeaders,
+        body: JSON.stringify({ path: presign.path })
       });
 
       const data = await response.json();
@@ -11,21 +11,29 @@ Optimized for RTX 2050 4GB with:
 
 from pathlib import Path
 import argparse
+import atexit
+import hashlib
 import json
+import multiprocessing
+import threading
 import re
+import sys
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import warnings
 import string
 from collections import Counter, defaultdict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 import numpy as np
 import nltk
 import requests
+from requests.adapters import HTTPAdapter
 import torch
+import torch.nn.functional as F
 import arxiv
 import fitz  # PyMuPDF
-from sklearn.metrics.pairwise import cosine_similarity
 from transformers import AutoTokenizer, AutoModel, pipeline
 from transformers import LEDTokenizer, LEDForConditionalGeneration
 
@@ -39,9 +47,29 @@ except Exception:
     KeyBERT = None
 
 try:
-    from bert_score import score as bert_score
+    from bert_score import BERTScorer
 except Exception:
-    bert_score = None
+    BERTScorer = None
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+try:
+    import intel_extension_for_pytorch as ipex
+except Exception:
+    ipex = None
+
+try:
+    import bitsandbytes as bnb
+except Exception:
+    bnb = None
+
+try:
+    from sentence_transformers import SentenceTransformer
+except Exception:
+    SentenceTransformer = None
 
 # Download required NLTK data
 try:
@@ -59,6 +87,97 @@ hf_logging.getLogger("transformers").setLevel(hf_logging.ERROR)
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 logger = logging.getLogger(__name__)
 
+# get_text("dict") defaults plus images; the layout pass only reads text
+# blocks, so leaving out TEXT_PRESERVE_IMAGES skips decoding every embedded
+# image into the page dict
+LAYOUT_TEXT_FLAGS = fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
+
+def _ncpu() -> int:
+    """CPUs this process may run on; respects taskset/cgroup affinity, unlike os.cpu_count()."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+# Longer PDFs have their pages parsed in worker processes; PyMuPDF holds the
+# GIL, so threads wouldn't help. PAPERMIND_PAGE_WORKERS=0 turns this off.
+PAGE_POOL_MIN_PAGES = 8
+PAGE_WORKERS = int(os.environ.get("PAPERMIND_PAGE_WORKERS", max(1, _ncpu() - 1)))
+_page_pool = None
+_page_pool_lock = threading.Lock()
+
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    """Process pool for page parsing, started on first use and kept for the process."""
+    global _page_pool
+    if _page_pool is None:
+        with _page_pool_lock:
+            if _page_pool is None:
+                # Spawned, not forked: the parent may hold CUDA state and model threads
+                _page_pool = ProcessPoolExecutor(
+                    max_workers=PAGE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                atexit.register(_page_pool.shutdown, wait=False)
+    return _page_pool
+
+
+def _page_blocks(page, mode: str) -> list:
+    """One page's blocks, top to bottom then left to right.
+    
+    mode "dict" gives the text blocks of PyMuPDF's dict view (fonts and
+    spans), "blocks" the plain (x0, y0, x1, y1, text, ...) tuples.
+    """
+    if mode == "dict":
+        blocks = page.get_text("dict", flags=LAYOUT_TEXT_FLAGS)["blocks"]
+        return [
+            block for block in sorted(blocks, key=lambda b: (b["bbox"][1], b["bbox"][0]))
+            if block.get("type") == 0 and "lines" in block  # Text block
+        ]
+    return sorted(page.get_text("blocks"), key=lambda b: (b[1], b[0]))  # y, then x
+
+
+def _page_range_blocks(pdf_path: str, start: int, stop: int, mode: str) -> List[list]:
+    """Worker-process body: _page_blocks for pages [start, stop)."""
+    with fitz.open(pdf_path) as doc:
+        return [_page_blocks(doc[pno], mode) for pno in range(start, stop)]
+
+
+def extract_page_blocks(pdf: Union[str, fitz.Document], mode: str) -> List[list]:
+    """_page_blocks for every page of a PDF, in page order.
+    
+    pdf is a path or an already open document, which is left open.
+    Pages are split into one contiguous range per worker when the PDF is
+    long enough to pay for the hand-off. Inside a worker process (the web
+    backend already parses whole papers in a process pool) pages are
+    parsed in place rather than nesting pools.
+    """
+    if not isinstance(pdf, fitz.Document):
+        with fitz.open(pdf) as doc:
+            return extract_page_blocks(doc, mode)
+    
+    n_pages = len(pdf)
+    if (n_pages <= PAGE_POOL_MIN_PAGES or PAGE_WORKERS < 1 or not pdf.name
+            or multiprocessing.parent_process() is not None):
+        return [_page_blocks(page, mode) for page in pdf]
+    
+    # Workers reopen the file by name; a Document can't be pickled
+    step = -(-n_pages // PAGE_WORKERS)
+    pool = _get_page_pool()
+    futures = [
+        pool.submit(_page_range_blocks, pdf.name, start, min(start + step, n_pages), mode)
+        for start in range(0, n_pages, step)
+    ]
+    return [page for future in futures for page in future.result()]
+
+
+_WORD_RE = re.compile(r'\S+')
+
+
+def count_words(text: str) -> int:
+    """Whitespace-separated word count, same as len(text.split()) without the list."""
+    return sum(1 for _ in _WORD_RE.finditer(text))
+
 
 class ArxivDatasetFetcher:
     def __init__(self, query="all", max_results=2, save_dir="arxiv_papers"):
@@ -66,21 +185,30 @@ class ArxivDatasetFetcher:
         self.max_results = max_results
         self.save_dir = Path(save_dir)
         self.save_dir.mkdir(parents=True, exist_ok=True)
+        # Reused across searches/downloads so keep-alive connections to arXiv persist
+        self.client = arxiv.Client()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
 
-    def fetch_papers(self):
-        logger.info(f"Fetching up to {self.max_results} papers from arXiv for query: '{self.query}'")
+    def fetch_papers(self, query=None, max_results=None):
+        """Fetch paper metadata; query/max_results override the constructor defaults."""
+        query = query or self.query
+        max_results = max_results or self.max_results
+        logger.info(f"Fetching up to {max_results} papers from arXiv for query: '{query}'")
         search = arxiv.Search(
-            query=self.query,
-            max_results=self.max_results,
+            query=query,
+            max_results=max_results,
             sort_by=arxiv.SortCriterion.SubmittedDate
         )
         papers = []
-        for result in search.results():
+        for result in self.client.results(search):
             papers.append({
                 "title": result.title,
                 "authors": [a.name for a in result.authors],
                 "summary": result.summary,
-                "pdf_url": result.pdf_url,
+                "pdf_url": self._export_url(result.pdf_url),
                 "arxiv_id": result.entry_id.split("/")[-1],
                 "published": str(result.published),
                 "primary_category": getattr(result, "primary_category", ""),
@@ -88,26 +216,83 @@ class ArxivDatasetFetcher:
         logger.info(f"Found {len(papers)} papers.")
         return papers
 
-    def download_pdfs(self, papers):
-        pdf_paths = []
-        for paper in papers:
-            pdf_path = self.save_dir / f"{paper['arxiv_id']}.pdf"
-            if pdf_path.exists():
-                logger.info(f"Already downloaded: {paper['title']}")
-                pdf_paths.append(str(pdf_path))
-                continue
+    @staticmethod
+    def _export_url(url):
+        """Point arxiv.org links at export.arxiv.org, arXiv's host for programmatic access."""
+        return url.replace("://arxiv.org/", "://export.arxiv.org/") if url else url
 
-            try:
-                logger.info(f"Downloading: {paper['title']}")
-                resp = requests.get(paper["pdf_url"], timeout=30)
-                resp.raise_for_status()
-                pdf_path.write_bytes(resp.content)
-                pdf_paths.append(str(pdf_path))
-                logger.info(f"Saved to {pdf_path}")
-            except Exception as e:
-                logger.warning(f"Failed to download {paper['title']}: {e}")
+    def download_single_pdf(self, paper) -> Optional[str]:
+        """Download one paper's PDF, returning its local path or None on failure."""
+        pdf_path = self.save_dir / f"{paper['arxiv_id']}.pdf"
+        if pdf_path.exists():
+            logger.info(f"Already downloaded: {paper['title']}")
+            return str(pdf_path)
+
+        try:
+            logger.info(f"Downloading: {paper['title']}")
+            # Write to a side file first so an interrupted download never
+            # leaves a truncated PDF that the exists() check would accept
+            self._fetch_to(paper["pdf_url"], pdf_path)
+            logger.info(f"Saved to {pdf_path}")
+            return str(pdf_path)
+        except Exception as e:
+            logger.warning(f"Failed to download {paper['title']}: {e}")
+            return None
+
+    def _fetch_to(self, url, pdf_path: Path, restarted: bool = False):
+        """Stream url into pdf_path via a .part file, resuming a previous partial download.
+        
+        The ETag of the first response is kept beside the .part file; a retry
+        asks for the remaining bytes with If-Range, so the server sends either
+        just the rest of the same file (206) or the whole, changed one (200).
+        """
+        part_path = pdf_path.with_suffix(".pdf.part")
+        etag_path = pdf_path.with_suffix(".pdf.etag")
+        
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        headers = {}
+        if offset and etag_path.exists():
+            headers = {"Range": f"bytes={offset}-", "If-Range": etag_path.read_text().strip()}
+        
+        with self.session.get(url, timeout=30, stream=True, headers=headers) as resp:
+            if resp.status_code == 416 and not restarted:
+                # Our partial file doesn't fit the server's copy; start over,
+                # once (a second 416 is raised below)
+                part_path.unlink(missing_ok=True)
+                etag_path.unlink(missing_ok=True)
+                return self._fetch_to(url, pdf_path, restarted=True)
+            resp.raise_for_status()
+            
+            resuming = resp.status_code == 206
+            if not resuming:
+                offset = 0
+                if resp.headers.get("ETag"):
+                    etag_path.write_text(resp.headers["ETag"])
+            
+            # Content-Length counts encoded bytes; only comparable when the
+            # body isn't content-encoded
+            expected = None
+            if "Content-Length" in resp.headers and "Content-Encoding" not in resp.headers:
+                expected = offset + int(resp.headers["Content-Length"])
+            
+            with open(part_path, "ab" if resuming else "wb") as f:
+                for chunk in resp.iter_content(chunk_size=1 << 20):
+                    f.write(chunk)
+        
+        size = part_path.stat().st_size
+        if expected is not None and size != expected:
+            raise IOError(f"incomplete download ({size} of {expected} bytes), will resume on retry")
+        
+        os.replace(part_path, pdf_path)
+        etag_path.unlink(missing_ok=True)
 
-        return pdf_paths
+    def download_pdfs(self, papers, max_workers=8):
+        """Download papers' PDFs concurrently; returns the paths that succeeded, in paper order."""
+        if not papers:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(papers))) as executor:
+            results = list(executor.map(self.download_single_pdf, papers))
+        return [pdf_path for pdf_path in results if pdf_path]
 
 
 class AdvancedSectionExtractor:
@@ -128,47 +313,48 @@ class AdvancedSectionExtractor:
         'references': ['references', 'bibliography', 'works cited'],
     }
     
+    # Leading section numbering stripped by _match_section
+    _NUMBER_RE = re.compile(r'^\d+\.?\s*')
+    _ROMAN_RE = re.compile(r'^[ivxlcdm]+\.?\s*')
+    
     def __init__(self):
         self.min_header_font_size = 9.0  # Typically headers are 10pt+
         self.max_header_length = 100
         self.min_paragraph_length = 50
+        # Per section, in SECTION_KEYWORDS order: any keyword as a prefix or
+        # as a whole word
+        self._section_patterns = []
+        for section_name, keywords in self.SECTION_KEYWORDS.items():
+            alternatives = '|'.join(map(re.escape, keywords))
+            self._section_patterns.append(
+                (section_name, re.compile(rf'^(?:{alternatives})|\b(?:{alternatives})\b'))
+            )
 
-    def extract_sections_from_pdf(self, pdf_path: str) -> Dict[str, str]:
-        """Extract sections using PDF layout analysis."""
+    def extract_sections_from_pdf(self, pdf: Union[str, fitz.Document]) -> Dict[str, str]:
+        """Extract sections using PDF layout analysis; pdf is a path or open document."""
         try:
-            doc = fitz.open(pdf_path)
-            
-            # First pass: analyze font sizes to determine header threshold
+            # Single parse: keep each page's text blocks and collect span font
+            # sizes for the header threshold
             font_sizes = []
-            for page in doc:
-                blocks = page.get_text("dict")["blocks"]
+            text_blocks = []
+            for blocks in extract_page_blocks(pdf, "dict"):
                 for block in blocks:
-                    if "lines" in block:
-                        for line in block["lines"]:
-                            for span in line["spans"]:
-                                font_sizes.append(span["size"])
+                    text_blocks.append(block)
+                    for line in block["lines"]:
+                        for span in line["spans"]:
+                            font_sizes.append(span["size"])
             
             if font_sizes:
-                avg_font_size = np.median(font_sizes)
+                avg_font_size = float(np.median(font_sizes))
                 self.min_header_font_size = avg_font_size + 0.5  # Lower threshold for better detection
                 logger.info(f"Font analysis - Median: {avg_font_size:.1f}, Header threshold: {self.min_header_font_size:.1f}")
             
-            # Second pass: extract text with structure
+            # Classify blocks now that the threshold is known
             structured_content = []
-            
-            for page_num, page in enumerate(doc):
-                blocks = page.get_text("dict")["blocks"]
-                
-                # Sort blocks by position (top to bottom, left to right)
-                blocks = sorted(blocks, key=lambda b: (b["bbox"][1], b["bbox"][0]))
-                
-                for block in blocks:
-                    if block.get("type") == 0:  # Text block
-                        text_content = self._extract_block_text(block)
-                        if text_content:
-                            structured_content.append(text_content)
-            
-            doc.close()
+            for block in text_blocks:
+                text_content = self._extract_block_text(block)
+                if text_content:
+                    structured_content.append(text_content)
             
             # Group into sections
             sections = self._group_into_sections(structured_content)
@@ -258,42 +444,69 @@ class AdvancedSectionExtractor:
     def _match_section(self, text_lower: str) -> Optional[str]:
         """Match text to a section type."""
         # Remove numbering (1., 2., II., etc.)
-        text_clean = re.sub(r'^\d+\.?\s*', '', text_lower)
-        text_clean = re.sub(r'^[ivxlcdm]+\.?\s*', '', text_clean)  # Roman numerals
+        text_clean = self._NUMBER_RE.sub('', text_lower)
+        text_clean = self._ROMAN_RE.sub('', text_clean)  # Roman numerals
         text_clean = text_clean.strip()
         
-        for section_name, keywords in self.SECTION_KEYWORDS.items():
-            for keyword in keywords:
-                # Match if starts with keyword or exact match or contains keyword as whole word
-                if (text_clean.startswith(keyword) or 
-                    text_clean == keyword or
-                    re.search(r'\b' + re.escape(keyword) + r'\b', text_clean)):
-                    return section_name
+        for section_name, pattern in self._section_patterns:
+            # Match if starts with keyword or exact match or contains keyword as whole word
+            if pattern.search(text_clean):
+                return section_name
         
         return None
 
 
+@lru_cache(maxsize=1)
+def _load_ner_pipeline():
+    """SciBERT token classifier, loaded once per process; None if unavailable."""
+    try:
+        return pipeline(
+            "token-classification",
+            model="allenai/scibert_scivocab_uncased",
+            aggregation_strategy="simple",
+            device=0 if torch.cuda.is_available() else -1,
+            model_kwargs={"low_cpu_mem_usage": True}
+        )
+    except Exception as e:
+        logger.warning(f"SciBERT NER unavailable, using fallback: {e}")
+        return None
+
+
+@lru_cache(maxsize=1)
+def _load_keyword_model():
+    """KeyBERT, loaded once per process; None if keybert isn't installed."""
+    return KeyBERT() if KeyBERT else None
+
+
 class EnhancedEntityExtractor:
     """Improved entity extraction with better context understanding."""
     
     def __init__(self):
         logger.info("Initializing enhanced entity extraction...")
         
-        # Initialize NER pipeline
-        try:
-            self.ner_pipeline = pipeline(
-                "token-classification",
-                model="allenai/scibert_scivocab_uncased",
-                aggregation_strategy="simple",
-                device=0 if torch.cuda.is_available() else -1,
-                model_kwargs={"low_cpu_mem_usage": True}
-            )
-        except Exception as e:
-            logger.warning(f"SciBERT NER unavailable, using fallback: {e}")
-            self.ner_pipeline = None
+        # Initialize NER pipeline; shared by every extractor in the process
+        self.ner_pipeline = _load_ner_pipeline()
         
         # Enhanced pattern database
         self.entity_patterns = self._build_entity_patterns()
+        self.entity_regex = self._fuse_patterns(self.entity_patterns)
+    
+    @staticmethod
+    def _fuse_patterns(entity_patterns: Dict[str, List[re.Pattern]]) -> re.Pattern:
+        """One alternation with a named group per entity type, for a single scan.
+        
+        Case-insensitive patterns keep their behaviour through scoped (?i:...)
+        groups. Matches no longer overlap: where two patterns match at the
+        same position the one listed first wins, as with any alternation.
+        """
+        groups = []
+        for entity_type, patterns in entity_patterns.items():
+            alternatives = "|".join(
+                f"(?i:{p.pattern})" if p.flags & re.IGNORECASE else f"(?:{p.pattern})"
+                for p in patterns
+            )
+            groups.append(f"(?P<{entity_type}>{alternatives})")
+        return re.compile("|".join(groups))
     
     def _build_entity_patterns(self) -> Dict[str, List[re.Pattern]]:
         """Build comprehensive regex patterns for entities."""
@@ -338,24 +551,21 @@ class EnhancedEntityExtractor:
     
     def extract_entities(self, text: str) -> Dict[str, List[str]]:
         """Extract entities using both patterns and NER."""
-        entities = defaultdict(set)
-        
-        # Pattern-based extraction
-        for entity_type, patterns in self.entity_patterns.items():
-            for pattern in patterns:
-                for match in pattern.finditer(text):
-                    entity = match.group(0).strip()
-                    if self._validate_entity(entity, entity_type, text):
-                        entities[entity_type].add(entity)
-        
-        # Deduplicate and limit
-        final_entities = {}
-        for entity_type, entity_set in entities.items():
-            # Sort by frequency in text
-            entity_list = list(entity_set)
-            entity_counts = {e: text.count(e) for e in entity_list}
-            sorted_entities = sorted(entity_list, key=lambda e: -entity_counts[e])
-            final_entities[entity_type] = sorted_entities[:15]
+        counts = defaultdict(Counter)
+        
+        # Pattern-based extraction, one pass over the text for every type;
+        # counting as we match ranks entities without rescanning the text
+        for match in self.entity_regex.finditer(text):
+            entity_type = match.lastgroup
+            entity = match.group(0).strip()
+            if self._validate_entity(entity, entity_type, text):
+                counts[entity_type][entity] += 1
+        
+        # Deduplicate and limit, most frequent first
+        final_entities = {
+            entity_type: [e for e, _ in entity_counts.most_common(15)]
+            for entity_type, entity_counts in counts.items()
+        }
         
         # Ensure all keys exist
         for key in ['models', 'datasets', 'metrics', 'frameworks', 'techniques']:
@@ -446,43 +656,39 @@ class FlowchartGenerator:
     
     def _build_mermaid(self, steps: List[str]) -> str:
         """Build Mermaid flowchart."""
-        mermaid = "graph TD\n"
-        mermaid += "    Start([Start])\n"
+        lines = ["graph TD", "    Start([Start])"]
         
         for i, step in enumerate(steps):
             node_id = f"S{i+1}"
             clean_step = step.replace('"', "'").replace('\n', ' ')
-            mermaid += f'    {node_id}["{clean_step}"]\n'
+            lines.append(f'    {node_id}["{clean_step}"]')
         
-        mermaid += "    End([End])\n"
-        mermaid += "    Start --> S1\n"
+        lines.append("    End([End])")
+        lines.append("    Start --> S1")
         
         for i in range(len(steps) - 1):
-            mermaid += f"    S{i+1} --> S{i+2}\n"
+            lines.append(f"    S{i+1} --> S{i+2}")
         
-        mermaid += f"    S{len(steps)} --> End\n"
+        lines.append(f"    S{len(steps)} --> End")
         
-        return mermaid
+        return "\n".join(lines) + "\n"
 
 
 class ImprovedPDFExtractor:
     """Improved PDF text extraction with column handling."""
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text with improved handling of layouts."""
+    def extract_text_from_pdf(self, pdf: Union[str, fitz.Document]) -> str:
+        """Extract text with improved handling of layouts; pdf is a path or open document."""
+        pdf_path = pdf.name if isinstance(pdf, fitz.Document) else pdf
         try:
-            doc = fitz.open(pdf_path)
+            # Use blocks for better layout handling, sorted by position (top to
+            # bottom, handling columns)
+            pages = extract_page_blocks(pdf, "blocks")
             text_parts = []
             
-            logger.info(f"📄 Processing {len(doc)} pages from {Path(pdf_path).name}")
+            logger.info(f"📄 Processing {len(pages)} pages from {Path(pdf_path).name}")
             
-            for page_num, page in enumerate(doc):
-                # Use blocks for better layout handling
-                blocks = page.get_text("blocks")
-                
-                # Sort blocks by position (top to bottom, handling columns)
-                blocks = sorted(blocks, key=lambda b: (b[1], b[0]))  # y, then x
-                
+            for page_num, blocks in enumerate(pages):
                 page_text = ""
                 for block in blocks:
                     if len(block) >= 5:
@@ -494,9 +700,7 @@ class ImprovedPDFExtractor:
                     text_parts.append(page_text)
                 
                 if page_num % 5 == 0:
-                    logger.info(f"  ✓ Processed page {page_num + 1}/{len(doc)}")
-            
-            doc.close()
+                    logger.info(f"  ✓ Processed page {page_num + 1}/{len(pages)}")
             
             full_text = "\n".join(text_parts)
             logger.info(f"✅ Extracted {len(full_text):,} characters")
@@ -511,8 +715,40 @@ class ImprovedPDFExtractor:
 class HierarchicalSummarizer:
     """Hierarchical summarization: paragraph → section → paper."""
     
-    def __init__(self, device=None):
+    # preprocess_text removals: citations ([1, 2] / (1, 2)), URLs, emails,
+    # and figure/table/equation references
+    _CLEANUP_RE = re.compile(
+        r'\[\d+(?:,\s*\d+)*\]'
+        r'|\(\d+(?:,\s*\d+)*\)'
+        r'|http[s]?://\S+'
+        r'|\S+@\S+'
+        r'|(?i:\b(?:fig|figure|table|eq)\.?\s*\d+)'
+    )
+    _WHITESPACE_RE = re.compile(r'\s+')
+    
+    # Sentences per encoder forward pass; bounds the [batch, tokens, hidden] activations
+    ENCODE_BATCH_SIZE = 32
+    # Padded sentence length when the encoder is compiled; quality sentences
+    # are under 500 characters, well inside it
+    COMPILED_SEQ_LEN = 128
+    # Sections per LED generate() call; 4096-token inputs x 4 beams each
+    ABSTRACTIVE_BATCH_SIZE = 4
+    # In-memory embedding cache entries (~768 bytes each) before it's reset
+    EMB_CACHE_MAX = 50_000
+    
+    def __init__(self, device=None, emb_cache_dir=None, keep_resident: bool = True):
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        # Keep the encoder and LED loaded together between sections and papers;
+        # False swaps them per section so only one is on a 4GB GPU at a time
+        self.keep_resident = keep_resident
+        
+        self.encoder_name = "sentence-transformers/all-MiniLM-L6-v2"
+        self._emb_cache: Dict[Tuple[str, str], np.ndarray] = {}
+        # Optional on-disk copy of the cache, one directory per encoder
+        self.emb_cache_dir = None
+        if emb_cache_dir is not None:
+            self.emb_cache_dir = Path(emb_cache_dir) / self.encoder_name.replace("/", "__")
+            self.emb_cache_dir.mkdir(parents=True, exist_ok=True)
         
         if self.device == "cuda":
             torch.cuda.empty_cache()
@@ -520,7 +756,19 @@ class HierarchicalSummarizer:
         
         self.sentence_encoder = None
         self.summarizer = None
-        self.kw_model = KeyBERT() if KeyBERT else None
+        self.kw_model = _load_keyword_model()
+        # bf16 generation on CPU; only a win on CPUs with AVX512-BF16/AMX
+        self.cpu_bf16 = self.device == "cpu" and os.environ.get("PAPERMIND_CPU_BF16") == "1"
+        # 8-bit LED weights; halves weight memory on 4GB cards, but bitsandbytes
+        # int8 generation is often slower than bf16/fp16, so it's opt-in
+        self.led_8bit = self.device == "cuda" and os.environ.get("PAPERMIND_LED_8BIT") == "1"
+        # CUDA-graph the encoder with torch.compile; opt-in since it needs a
+        # working Triton and the first batches pay for compilation
+        self.compile_encoder = (
+            self.device == "cuda"
+            and hasattr(torch, "compile")
+            and os.environ.get("PAPERMIND_TORCH_COMPILE") == "1"
+        )
         
         # Use LED for longer context
         self.model_name = "allenai/led-base-16384"
@@ -529,7 +777,15 @@ class HierarchicalSummarizer:
         """Load sentence encoder for extractive summarization."""
         if self.sentence_encoder is None:
             logger.info("Loading sentence encoder...")
-            model_name = "sentence-transformers/all-MiniLM-L6-v2"
+            # sentence-transformers brings batching, pooling, normalization
+            # and the ONNX backend; the hand-rolled AutoModel path is kept for
+            # when it's missing and for torch.compile's fixed-shape batches
+            if SentenceTransformer is not None and not self.compile_encoder:
+                self.sentence_encoder = self._load_st_encoder()
+                self.tokenizer = None
+                return
+            
+            model_name = self.encoder_name
             self.tokenizer = AutoTokenizer.from_pretrained(model_name)
             try:
                 self.sentence_encoder = AutoModel.from_pretrained(
@@ -543,6 +799,23 @@ class HierarchicalSummarizer:
                 self.sentence_encoder = self.sentence_encoder.to(self.device)
                 if self.device == "cuda":
                     self.sentence_encoder = self.sentence_encoder.half()
+            
+            if self.compile_encoder:
+                self.sentence_encoder = torch.compile(
+                    self.sentence_encoder.eval(),
+                    mode="reduce-overhead",
+                    dynamic=False
+                )
+    
+    def _load_st_encoder(self):
+        """MiniLM as a SentenceTransformer: ONNX Runtime on CPU when available, fp16 on CUDA."""
+        if self.device == "cpu":
+            try:
+                return SentenceTransformer(self.encoder_name, device="cpu", backend="onnx")
+            except Exception as e:
+                logger.info(f"ONNX sentence encoder unavailable, using PyTorch: {e}")
+        encoder = SentenceTransformer(self.encoder_name, device=self.device)
+        return encoder.half() if self.device == "cuda" else encoder
     
     def _unload_sentence_encoder(self):
         """Unload sentence encoder."""
@@ -559,17 +832,50 @@ class HierarchicalSummarizer:
             logger.info(f"Loading summarizer: {self.model_name}")
             self.sum_tokenizer = LEDTokenizer.from_pretrained(self.model_name)
             try:
-                self.summarizer = LEDForConditionalGeneration.from_pretrained(
-                    self.model_name,
-                    low_cpu_mem_usage=True,
-                    torch_dtype=torch.float16 if self.device == "cuda" else torch.float32
-                ).to(self.device)
+                self.summarizer = self._load_quantized_summarizer() if self.led_8bit else None
+                if self.summarizer is None:
+                    self.summarizer = LEDForConditionalGeneration.from_pretrained(
+                        self.model_name,
+                        low_cpu_mem_usage=True,
+                        torch_dtype=self._summarizer_dtype()
+                    ).to(self.device)
             except Exception as e:
                 logger.warning(f"Failed to load with optimizations, trying default: {e}")
                 self.summarizer = LEDForConditionalGeneration.from_pretrained(self.model_name)
                 self.summarizer = self.summarizer.to(self.device)
                 if self.device == "cuda":
                     self.summarizer = self.summarizer.half()
+            
+            if self.device == "cpu" and ipex is not None:
+                # Fused CPU kernels (and weight prepacking) for inference
+                self.summarizer = ipex.optimize(
+                    self.summarizer.eval(),
+                    dtype=torch.bfloat16 if self.cpu_bf16 else torch.float32
+                )
+    
+    def _summarizer_dtype(self) -> torch.dtype:
+        """bf16 on GPUs that support it (fp16 overflows in LED's long
+        attention more easily), fp16 on older cards, fp32 on CPU."""
+        if self.device != "cuda":
+            return torch.float32
+        return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+    
+    def _load_quantized_summarizer(self):
+        """LED with 8-bit weights via bitsandbytes, or None if that isn't available."""
+        if bnb is None:
+            logger.warning("PAPERMIND_LED_8BIT set but bitsandbytes is not installed")
+            return None
+        try:
+            from transformers import BitsAndBytesConfig
+            return LEDForConditionalGeneration.from_pretrained(
+                self.model_name,
+                quantization_config=BitsAndBytesConfig(load_in_8bit=True),
+                device_map={"": 0},
+                low_cpu_mem_usage=True
+            )
+        except Exception as e:
+            logger.warning(f"8-bit summarizer load failed, using {self._summarizer_dtype()}: {e}")
+            return None
     
     def _unload_summarizer(self):
         """Unload summarizer."""
@@ -580,24 +886,115 @@ class HierarchicalSummarizer:
             if self.device == "cuda":
                 torch.cuda.empty_cache()
     
+    def warmup(self):
+        """Load the models and run each once on a tiny input.
+        
+        Moves model loading and the first-call costs (CUDA context, kernel
+        selection, ONNX session setup) ahead of the first paper. When models
+        are swapped per section only the encoder is warmed, so both never
+        sit on the GPU together.
+        """
+        self._encode_sentences(["Warmup sentence for the encoder."])
+        if not self.keep_resident:
+            return
+        self._load_summarizer()
+        inputs = self.sum_tokenizer(["Warmup text for the summarizer."], return_tensors="pt").to(self.device)
+        global_attention_mask = torch.zeros_like(inputs['input_ids'])
+        global_attention_mask[:, 0] = 1
+        with torch.no_grad(), torch.autocast("cpu", dtype=torch.bfloat16, enabled=self.cpu_bf16):
+            self.summarizer.generate(
+                inputs['input_ids'],
+                attention_mask=inputs['attention_mask'],
+                global_attention_mask=global_attention_mask,
+                max_length=8,
+                num_beams=1
+            )
+    
     def preprocess_text(self, text: str) -> str:
         """Clean text while preserving structure."""
-        # Remove citations
-        text = re.sub(r'\[\d+(?:,\s*\d+)*\]', '', text)
-        text = re.sub(r'\(\d+(?:,\s*\d+)*\)', '', text)
-        
-        # Remove URLs and emails
-        text = re.sub(r'http[s]?://\S+', '', text)
-        text = re.sub(r'\S+@\S+', '', text)
-        
-        # Remove figure/table references
-        text = re.sub(r'\b(fig|figure|table|eq)\.?\s*\d+', '', text, flags=re.I)
+        # Remove citations, URLs, emails and figure/table references in one pass
+        text = self._CLEANUP_RE.sub('', text)
         
         # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = self._WHITESPACE_RE.sub(' ', text)
         
         return text.strip()
     
+    def _encode_sentences(self, sentences: List[str]) -> torch.Tensor:
+        """Unit-normalized sentence embeddings, encoded in mini-batches.
+        
+        Mean pooling is weighted by the attention mask so padding tokens don't
+        dilute short sentences; the result stays on self.device in the
+        encoder's dtype.
+        """
+        self._load_sentence_encoder()
+        
+        if self.tokenizer is None:
+            # SentenceTransformer: same masked mean pooling, normalized by encode()
+            return self.sentence_encoder.encode(
+                sentences,
+                batch_size=self.ENCODE_BATCH_SIZE,
+                convert_to_tensor=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+        
+        batches = []
+        with torch.inference_mode():
+            for start in range(0, len(sentences), self.ENCODE_BATCH_SIZE):
+                # A compiled encoder gets one fixed sequence length so its
+                # captured graphs are reused instead of recompiled per batch
+                inputs = self.tokenizer(
+                    sentences[start:start + self.ENCODE_BATCH_SIZE],
+                    padding="max_length" if self.compile_encoder else True,
+                    max_length=self.COMPILED_SEQ_LEN if self.compile_encoder else None,
+                    truncation=True,
+                    return_tensors="pt"
+                ).to(self.device)
+                hidden = self.sentence_encoder(**inputs).last_hidden_state
+                mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                batches.append((hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp_min(1))
+        
+        return F.normalize(torch.cat(batches), dim=1)
+    
+    def _cached_embeddings(self, sentences: List[str]) -> torch.Tensor:
+        """_encode_sentences, reusing embeddings of sentences seen before.
+        
+        Vectors are kept per (encoder, content hash) as fp16 host arrays and,
+        with emb_cache_dir set, as .npy files so reruns on the same papers
+        skip the encoder too.
+        """
+        keys = [hashlib.blake2b(s.encode("utf-8"), digest_size=16).hexdigest() for s in sentences]
+        vectors = [self._emb_cache.get((self.encoder_name, key)) for key in keys]
+        
+        if self.emb_cache_dir is not None:
+            for i, key in enumerate(keys):
+                if vectors[i] is None:
+                    path = self.emb_cache_dir / f"{key}.npy"
+                    if path.exists():
+                        vectors[i] = np.load(path)
+                        self._emb_cache[(self.encoder_name, key)] = vectors[i]
+        
+        # Encode each distinct missing sentence once
+        missing = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[i], sentences[i])
+        
+        if missing:
+            if len(self._emb_cache) + len(missing) > self.EMB_CACHE_MAX:
+                self._emb_cache.clear()
+            encoded = self._encode_sentences(list(missing.values())).to(torch.float16).cpu().numpy()
+            fresh = dict(zip(missing, encoded))
+            for key, vector in fresh.items():
+                self._emb_cache[(self.encoder_name, key)] = vector
+                if self.emb_cache_dir is not None:
+                    np.save(self.emb_cache_dir / f"{key}.npy", vector)
+            vectors = [fresh[key] if vector is None else vector for key, vector in zip(keys, vectors)]
+        
+        dtype = torch.float16 if self.device == "cuda" else torch.float32
+        return torch.from_numpy(np.stack(vectors)).to(self.device, dtype=dtype)
+    
     def extractive_summary(self, text: str, ratio: float = 0.3) -> str:
         """Extractive summarization using sentence embeddings."""
         sentences = nltk.sent_tokenize(text)
@@ -610,59 +1007,79 @@ class HierarchicalSummarizer:
         if not quality_sents:
             return text
         
-        self._load_sentence_encoder()
-        
         # Encode sentences
-        inputs = self.tokenizer(quality_sents, padding=True, truncation=True, return_tensors="pt").to(self.device)
-        with torch.no_grad():
-            outputs = self.sentence_encoder(**inputs)
-        embeddings = outputs.last_hidden_state.mean(dim=1).cpu().numpy()
+        embeddings = self._cached_embeddings(quality_sents)
         
-        # Calculate importance scores
-        doc_embedding = embeddings.mean(axis=0)
-        scores = cosine_similarity(embeddings, [doc_embedding]).flatten()
+        # Calculate importance scores: cosine similarity to the document
+        # centroid, a plain matrix-vector product on unit vectors
+        doc_embedding = F.normalize(embeddings.mean(dim=0), dim=0)
+        scores = (embeddings @ doc_embedding).float().cpu().numpy()
         
         # Select top sentences
-        n_select = max(3, int(len(quality_sents) * ratio))
-        top_indices = np.argsort(scores)[-n_select:]
+        n_select = min(len(quality_sents), max(3, int(len(quality_sents) * ratio)))
+        # Only the set matters (output keeps document order), so a linear
+        # partition is enough; no full sort of the scores
+        top_indices = np.argpartition(scores, -n_select)[-n_select:]
         selected = [quality_sents[i] for i in sorted(top_indices)]
         
         return " ".join(selected)
     
     def abstractive_summary(self, text: str, max_length: int = 256) -> str:
         """Abstractive summarization using LED."""
-        if not text.strip():
-            return ""
+        return self.abstractive_summary_batch([text], [max_length])[0]
+    
+    def abstractive_summary_batch(self, texts: List[str], max_lengths: List[int]) -> List[str]:
+        """Abstractive summaries of several texts, batched into shared generate() calls.
         
-        self._load_summarizer()
+        Texts are grouped by max_length (a generate() argument) and padded
+        into batches of up to ABSTRACTIVE_BATCH_SIZE; results keep input order.
+        """
+        summaries = [""] * len(texts)
+        groups = defaultdict(list)
+        for i, (text, max_length) in enumerate(zip(texts, max_lengths)):
+            if text.strip():
+                groups[max_length].append(i)
         
-        # Tokenize with global attention on first token
-        inputs = self.sum_tokenizer(
-            text,
-            return_tensors="pt",
-            max_length=4096,
-            truncation=True
-        ).to(self.device)
+        if not groups:
+            return summaries
         
-        # Set global attention
-        global_attention_mask = torch.zeros_like(inputs['input_ids'])
-        global_attention_mask[:, 0] = 1
+        self._load_summarizer()
         
-        with torch.no_grad():
-            summary_ids = self.summarizer.generate(
-                inputs['input_ids'],
-                attention_mask=inputs['attention_mask'],
-                global_attention_mask=global_attention_mask,
-                max_length=max_length,
-                min_length=50,
-                num_beams=4,
-                length_penalty=2.0,
-                no_repeat_ngram_size=3,
-                early_stopping=True
-            )
+        for max_length, indices in groups.items():
+            for start in range(0, len(indices), self.ABSTRACTIVE_BATCH_SIZE):
+                batch = indices[start:start + self.ABSTRACTIVE_BATCH_SIZE]
+                
+                # Tokenize with global attention on first token
+                inputs = self.sum_tokenizer(
+                    [texts[i] for i in batch],
+                    return_tensors="pt",
+                    padding=True,
+                    max_length=4096,
+                    truncation=True
+                ).to(self.device)
+                
+                # Set global attention
+                global_attention_mask = torch.zeros_like(inputs['input_ids'])
+                global_attention_mask[:, 0] = 1
+                
+                with torch.no_grad(), torch.autocast("cpu", dtype=torch.bfloat16, enabled=self.cpu_bf16):
+                    summary_ids = self.summarizer.generate(
+                        inputs['input_ids'],
+                        attention_mask=inputs['attention_mask'],
+                        global_attention_mask=global_attention_mask,
+                        max_length=max_length,
+                        min_length=50,
+                        num_beams=4,
+                        length_penalty=2.0,
+                        no_repeat_ngram_size=3,
+                        early_stopping=True
+                    )
+                
+                decoded = self.sum_tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+                for i, summary in zip(batch, decoded):
+                    summaries[i] = self._clean_summary(summary)
         
-        summary = self.sum_tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-        return self._clean_summary(summary)
+        return summaries
     
     def _clean_summary(self, summary: str) -> str:
         """Clean generated summary."""
@@ -689,40 +1106,81 @@ class HierarchicalSummarizer:
     
     def summarize_section(self, section_text: str, section_name: str) -> Tuple[str, List[str]]:
         """Summarize a single section hierarchically."""
-        logger.info(f"Summarizing {section_name}...")
-        
-        # Clean text
-        clean_text = self.preprocess_text(section_text)
-        
-        if len(clean_text.split()) < 50:
-            return clean_text, []
-        
-        # Extractive first
-        extractive = self.extractive_summary(clean_text, ratio=0.4)
-        self._unload_sentence_encoder()
+        return self.summarize_sections({section_name: section_text})[section_name]
+    
+    def summarize_sections(self, sections: Dict[str, str]) -> Dict[str, Tuple[str, List[str]]]:
+        """Summarize sections hierarchically: section name -> (summary, keywords).
         
-        # Then abstractive
-        max_len = 200 if section_name in ['introduction', 'conclusion'] else 150
-        abstractive = self.abstractive_summary(extractive, max_length=max_len)
-        self._unload_summarizer()
+        Every extractive pass runs before the abstractive ones so LED
+        summarizes all sections in batched generate() calls.
+        """
+        results = {}
+        pending = {}
+        max_lengths = []
+        extracted = False
         
-        # Extract keywords
-        keywords = self.extract_keywords(abstractive, n=5)
+        for section_name, section_text in sections.items():
+            logger.info(f"Summarizing {section_name}...")
+            
+            # Clean text
+            clean_text = self.preprocess_text(section_text)
+            
+            if count_words(clean_text) < 50:
+                results[section_name] = (clean_text, [])
+                continue
+            
+            # Extractive first
+            extractive = self.extractive_summary(clean_text, ratio=0.4)
+            extracted = True
+            max_len = 200 if section_name in ['introduction', 'conclusion'] else 150
+            
+            # Already about the target length: beam search wouldn't shorten it
+            # meaningfully, so the extractive summary stands
+            if count_words(extractive) <= int(max_len * 1.2):
+                logger.debug(f"{section_name}: extractive summary kept, skipping LED")
+                results[section_name] = (extractive, self.extract_keywords(extractive, n=5))
+                continue
+            
+            logger.debug(f"{section_name}: queued for abstractive summary")
+            pending[section_name] = extractive
+            max_lengths.append(max_len)
+        
+        if extracted and not self.keep_resident:
+            self._unload_sentence_encoder()
+        
+        if pending:
+            # Then abstractive
+            abstractives = self.abstractive_summary_batch(list(pending.values()), max_lengths)
+            if not self.keep_resident:
+                self._unload_summarizer()
+            
+            # Extract keywords
+            for section_name, abstractive in zip(pending, abstractives):
+                results[section_name] = (abstractive, self.extract_keywords(abstractive, n=5))
         
-        return abstractive, keywords
+        # Keep the caller's section order
+        return {name: results[name] for name in sections}
 
 
 class EnhancedResearchPaperSummarizer:
     """Main summarizer with all improvements integrated."""
     
-    def __init__(self, device=None):
+    def __init__(self, device=None, emb_cache_dir=None, keep_resident=None):
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        if keep_resident is None:
+            keep_resident = os.environ.get("PAPERMIND_SWAP_MODELS") != "1"
         
-        self.section_extractor = AdvancedSectionExtractor()
         self.entity_extractor = EnhancedEntityExtractor()
-        self.pdf_extractor = ImprovedPDFExtractor()
         self.flowchart_generator = FlowchartGenerator()
-        self.hierarchical_summarizer = HierarchicalSummarizer(device=self.device)
+        self.hierarchical_summarizer = HierarchicalSummarizer(
+            device=self.device,
+            emb_cache_dir=emb_cache_dir,
+            keep_resident=keep_resident
+        )
+    
+    def warmup(self):
+        """Load and warm the models before the first paper."""
+        self.hierarchical_summarizer.warmup()
     
     def summarize_paper(self, pdf_path: str) -> Dict:
         """Summarize paper with all enhancements."""
@@ -730,18 +1188,40 @@ class EnhancedResearchPaperSummarizer:
         logger.info("PROCESSING PAPER")
         logger.info("="*60)
         
-        # Extract sections using advanced method
-        logger.info("📑 Extracting sections with layout analysis...")
-        sections = self.section_extractor.extract_sections_from_pdf(pdf_path)
-        
-        if not sections:
-            # Fallback to basic extraction
-            logger.warning("Layout-based extraction failed, using fallback...")
-            raw_text = self.pdf_extractor.extract_text_from_pdf(pdf_path)
-            sections = {'introduction': raw_text}
+        return self.summarize_sections(self.extract_sections(pdf_path))
+    
+    @staticmethod
+    def extract_sections(pdf_path: str) -> Dict[str, str]:
+        """CPU-only stage of summarize_paper: parse the PDF into sections.
+        
+        Uses fresh extractors (AdvancedSectionExtractor stores the per-document
+        header threshold on itself) and no models, so this is safe to call from
+        several threads or in a worker process.
+        """
+        try:
+            doc = fitz.open(pdf_path)
+        except Exception as e:
+            logger.error(f"❌ Could not open {pdf_path}: {e}")
+            return {'introduction': ''}
+        
+        # One open document for both extractors, so the fallback doesn't
+        # reopen the file and rebuild its font tables
+        with doc:
+            # Extract sections using advanced method
+            logger.info("📑 Extracting sections with layout analysis...")
+            sections = AdvancedSectionExtractor().extract_sections_from_pdf(doc)
+            
+            if not sections:
+                # Fallback to basic extraction
+                logger.warning("Layout-based extraction failed, using fallback...")
+                raw_text = ImprovedPDFExtractor().extract_text_from_pdf(doc)
+                sections = {'introduction': raw_text}
         
         logger.info(f"Found sections: {list(sections.keys())}")
-        
+        return sections
+    
+    def summarize_sections(self, sections: Dict[str, str]) -> Dict:
+        """Model stage of summarize_paper: entities, summaries, keywords, flowchart."""
         # Combine for entity extraction
         full_text = " ".join(sections.values())
         
@@ -753,14 +1233,14 @@ class EnhancedResearchPaperSummarizer:
         section_keywords = {}
         
         # Summarize ALL detected sections instead of just priority ones
-        for section_name, section_text in sections.items():
-            if section_text and section_name != 'references':  # Skip references
-                summary, keywords = self.hierarchical_summarizer.summarize_section(
-                    section_text, 
-                    section_name
-                )
-                section_summaries[section_name] = summary
-                section_keywords[section_name] = keywords
+        summarized = self.hierarchical_summarizer.summarize_sections({
+            section_name: section_text
+            for section_name, section_text in sections.items()
+            if section_text and section_name != 'references'  # Skip references
+        })
+        for section_name, (summary, keywords) in summarized.items():
+            section_summaries[section_name] = summary
+            section_keywords[section_name] = keywords
         
         # Generate overall summary
         logger.info("📝 Generating overall summary...")
@@ -781,18 +1261,47 @@ class EnhancedResearchPaperSummarizer:
             "entities": entities,
             "methodology_flowchart": flowchart,
             "sections_found": list(sections.keys()),
-            "num_words_original": len(full_text.split()),
-            "num_words_summary": len(combined_text.split()),
+            "num_words_original": count_words(full_text),
+            "num_words_summary": count_words(combined_text),
         }
 
 
+def _bert_scorer(device: str) -> "BERTScorer":
+    """BERTScorer for English; roberta-large runs in half precision on GPU."""
+    scorer = BERTScorer(lang='en', device=device, batch_size=32, use_fast_tokenizer=True)
+    if device == 'cuda':
+        dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        scorer._model = scorer._model.to(dtype)
+    return scorer
+
+
+def _intern_terms(terms: List[str]) -> List[str]:
+    """terms deduplicated in order, each interned so papers share repeated strings."""
+    return list(dict.fromkeys(sys.intern(term) for term in terms))
+
+
+def _dump_json(obj) -> bytes:
+    """Indented UTF-8 JSON; orjson when installed, else the json module."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY, default=float)
+    return json.dumps(obj, indent=2, default=float, ensure_ascii=False).encode("utf-8")
+
+
+def _save_summary(summaries_folder: Path, summary_data: Dict):
+    """Write one paper's summary_<arxiv_id>.json."""
+    out_file = summaries_folder / f"summary_{summary_data['arxiv_id']}.json"
+    out_file.write_bytes(_dump_json(summary_data))
+    logger.info(f"\n✅ Saved summary to {out_file}")
+
+
 def main(argv=None):
     parser = argparse.ArgumentParser(
         description="Enhanced ArXiv research paper summarizer with advanced section detection"
     )
     parser.add_argument("--query", default="cat:cs.LG", help="arXiv query")
     parser.add_argument("--max-results", type=int, default=5, help="max papers to fetch")
-    parser.add_argument("--save-dir", default="arxiv_papers", help="directory for PDFs")
+    parser.add_argument("--save-dir", type=Path, default=Path("arxiv_papers"), help="directory for PDFs")
+    parser.add_argument("--summaries-dir", type=Path, default=Path("summaries_final"), help="directory for summary JSON files")
     parser.add_argument("--evaluate", action="store_true", help="evaluate summaries with BERT F1 score")
     args = parser.parse_args(argv)
 
@@ -804,78 +1313,139 @@ def main(argv=None):
     )
     papers = fetcher.fetch_papers()
     pdf_paths = fetcher.download_pdfs(papers)
+    # download_pdfs drops failed downloads, so pair by path rather than position
+    info_by_path = {str(fetcher.save_dir / f"{p['arxiv_id']}.pdf"): p for p in papers}
+    jobs = [(pdf_path, info_by_path[pdf_path]) for pdf_path in pdf_paths]
 
     # Create summaries folder
-    summaries_folder = Path("summaries_final")
+    summaries_folder = args.summaries_dir
     summaries_folder.mkdir(parents=True, exist_ok=True)
 
-    # Initialize summarizer
-    summarizer = EnhancedResearchPaperSummarizer()
+    # Decided once for the run rather than per paper
+    evaluate = args.evaluate and BERTScorer is not None
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
 
-    # Process papers
-    results = []
-    for pdf_path, info in zip(pdf_paths, papers):
-        logger.info(f"\n{'='*60}")
-        logger.info(f"Processing: {info['title']}")
-        logger.info('='*60)
-        
-        try:
-            summary_data = summarizer.summarize_paper(pdf_path)
-            summary_data.update({
-                "title": info["title"],
-                "authors": info["authors"],
-                "arxiv_id": info["arxiv_id"],
-                "published": info["published"],
-                "primary_category": info.get("primary_category", ""),
-                "abstract_original": info.get("summary", ""),
-            })
-            results.append(summary_data)
-            
-            # Save individual summary
-            out_file = summaries_folder / f"summary_{info['arxiv_id']}.json"
-            out_file.write_text(json.dumps(summary_data, indent=2), encoding="utf-8")
-            logger.info(f"\n✅ Saved summary to {out_file}")
-            
-            # Display key findings
-            logger.info(f"\n📊 Key Findings:")
-            logger.info(f"  Sections: {', '.join(summary_data['sections_found'])}")
-            logger.info(f"  Datasets: {', '.join(summary_data['entities']['datasets'][:5]) if summary_data['entities']['datasets'] else 'None detected'}")
-            logger.info(f"  Models: {', '.join(summary_data['entities']['models'][:5]) if summary_data['entities']['models'] else 'None detected'}")
-            logger.info(f"  Metrics: {', '.join(summary_data['entities']['metrics'][:5]) if summary_data['entities']['metrics'] else 'None detected'}")
-            logger.info(f"  Keywords: {', '.join(summary_data['overall_keywords'][:8])}")
-            logger.info(f"  Compression: {(1 - summary_data['num_words_summary'] / summary_data['num_words_original']) * 100:.1f}%")
-            
-            # BERT F1 evaluation if requested
-            if args.evaluate and bert_score and info.get("summary"):
-                logger.info(f"\n📊 BERT F1 Evaluation:")
-                try:
-                    P, R, F1 = bert_score(
-                        [summary_data['overall_summary']], 
-                        [info['summary']], 
-                        lang='en', 
-                        verbose=False,
-                        device='cuda' if torch.cuda.is_available() else 'cpu'
+    # Initialize summarizer; sentence embeddings persist next to the PDFs
+    summarizer = EnhancedResearchPaperSummarizer(device=device, emb_cache_dir=args.save_dir / ".embcache")
+    # Inference only from here on; no autograd bookkeeping in any model call
+    torch.set_grad_enabled(False)
+
+    # Process papers: PDFs are parsed into sections in worker processes (CPU
+    # bound, independent per paper) while this process runs the models on
+    # each paper as soon as its sections are ready. The models stay in one
+    # process; a copy per worker wouldn't fit on a 4GB GPU.
+    # One slot per paper so results keep arXiv order whatever order parsing
+    # finishes in; papers that fail stay None
+    results = [None] * len(jobs)
+    # Per-paper JSON files are written off the main thread so disk writes
+    # overlap with the next paper's summarization
+    writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='summary-writer')
+    pending_writes = []
+    parse_pool = ProcessPoolExecutor(
+        max_workers=max(1, min(len(jobs), _ncpu() - 1)),
+        mp_context=multiprocessing.get_context("spawn")
+    )
+    with parse_pool:
+        futures = {
+            parse_pool.submit(EnhancedResearchPaperSummarizer.extract_sections, pdf_path): (i, info)
+            for i, (pdf_path, info) in enumerate(jobs)
+        }
+        # Workers are parsing already, so model loading overlaps with them
+        if jobs:
+            try:
+                summarizer.warmup()
+            except Exception as e:
+                logger.warning(f"Model warmup failed, loading on first paper instead: {e}")
+        for future in as_completed(futures):
+            i, info = futures[future]
+            logger.info(f"\n{'='*60}")
+            logger.info(f"Processing: {info['title']}")
+            logger.info('='*60)
+    
+            try:
+                summary_data = summarizer.summarize_sections(future.result())
+                summary_data |= {
+                    "title": info["title"],
+                    "authors": info["authors"],
+                    "arxiv_id": info["arxiv_id"],
+                    "published": info["published"],
+                    "primary_category": info.get("primary_category", ""),
+                    "abstract_original": info.get("summary", ""),
+                }
+                # Entities and keywords repeat across papers ("ImageNet",
+                # "BERT", "accuracy"); results holds one copy of each
+                entities = summary_data["entities"]
+                for entity_type in entities:
+                    entities[entity_type] = _intern_terms(entities[entity_type])
+                summary_data["overall_keywords"] = _intern_terms(summary_data["overall_keywords"])
+                for section_name, keywords in summary_data["section_keywords"].items():
+                    summary_data["section_keywords"][section_name] = _intern_terms(keywords)
+                results[i] = summary_data
+        
+                # Save individual summary; with --evaluate that waits for the
+                # scores so each file is written once
+                if not evaluate:
+                    pending_writes.append(writer.submit(_save_summary, summaries_folder, summary_data))
+        
+                # Display key findings, as one log record; the joins are
+                # skipped entirely when INFO is off
+                if logger.isEnabledFor(logging.INFO):
+                    # An empty PDF has no words to compress
+                    num_words_original = summary_data['num_words_original'] or 1
+                    logger.info(
+                        "\n📊 Key Findings:\n  Sections: %s\n  Datasets: %s\n  Models: %s"
+                        "\n  Metrics: %s\n  Keywords: %s\n  Compression: %.1f%%",
+                        ', '.join(summary_data['sections_found']),
+                        ', '.join(entities['datasets'][:5]) or 'None detected',
+                        ', '.join(entities['models'][:5]) or 'None detected',
+                        ', '.join(entities['metrics'][:5]) or 'None detected',
+                        ', '.join(summary_data['overall_keywords'][:8]),
+                        (1 - summary_data['num_words_summary'] / num_words_original) * 100
                     )
-                    summary_data['bert_f1'] = float(F1[0])
-                    summary_data['bert_precision'] = float(P[0])
-                    summary_data['bert_recall'] = float(R[0])
-                    logger.info(f"  Precision: {P[0]:.4f}")
-                    logger.info(f"  Recall: {R[0]:.4f}")
-                    logger.info(f"  F1 Score: {F1[0]:.4f}")
-                except Exception as e:
-                    logger.warning(f"  BERT evaluation failed: {e}")
-            
-        except Exception as e:
-            logger.error(f"❌ Error processing {info['title']}: {e}")
-            import traceback
-            traceback.print_exc()
+        
+            except Exception as e:
+                logger.exception(f"❌ Error processing {info['title']}: {e}")
+
+    results = [summary_data for summary_data in results if summary_data is not None]
+
+    # BERT F1 evaluation if requested, one batched call for every paper
+    if evaluate:
+        scored = [r for r in results if r.get("abstract_original")]
+        if scored:
+            logger.info(f"\n📊 BERT F1 Evaluation ({len(scored)} papers):")
+            try:
+                P, R, F1 = _bert_scorer(device).score(
+                    [r['overall_summary'] for r in scored],
+                    [r['abstract_original'] for r in scored]
+                )
+                for r, p, rc, f1 in zip(scored, P.tolist(), R.tolist(), F1.tolist()):
+                    r['bert_f1'] = f1
+                    r['bert_precision'] = p
+                    r['bert_recall'] = rc
+                    logger.info(f"  {r['arxiv_id']}: Precision {p:.4f}, Recall {rc:.4f}, F1 Score {f1:.4f}")
+            except Exception as e:
+                logger.warning(f"  BERT evaluation failed: {e}")
+        
+        for summary_data in results:
+            pending_writes.append(writer.submit(_save_summary, summaries_folder, summary_data))
+
+    with writer:
+        for write in pending_writes:
+            try:
+                write.result()
+            except OSError as e:
+                logger.error(f"❌ Failed to save summary: {e}")
 
     # Save all summaries
     all_summaries_file = summaries_folder / "arxiv_summaries_dataset.json"
-    all_summaries_file.write_text(
-        json.dumps(results, indent=2),
-        encoding="utf-8"
-    )
+    # One paper at a time, so the whole dataset never exists as one buffer
+    with all_summaries_file.open("wb") as fh:
+        fh.write(b"[\n")
+        for i, summary_data in enumerate(results):
+            if i:
+                fh.write(b",\n")
+            fh.write(_dump_json(summary_data))
+        fh.write(b"\n]")
     logger.info(f"\n{'='*60}")
     logger.info(f"✅ All {len(results)} summaries saved to {all_summaries_file}")
     logger.info('='*60)